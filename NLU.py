@@ -9,77 +9,248 @@ from nltk.stem import WordNetLemmatizer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import make_pipeline
+import argparse
+import functools
+import hashlib
+import itertools
+import joblib
 import spacy
 import json
 import os
-import platform
+import re
+import sys
 
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
+# The executor is shared with ScriptModule. It is imported from system_commands directly
+# because importing the jarvis.modules package loads the chat models.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "jarvis", "modules"))
+
+from system_commands.executor import CommandExecutor  # noqa: E402
+
+# Bump when the pipeline layout changes so older artifacts are retrained.
+ARTIFACT_VERSION = 2
+DEFAULT_ARTIFACT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"nlu_intent_v{ARTIFACT_VERSION}.joblib")
+
+# Each entry lists alternative resource paths; newer NLTK releases ship punkt as punkt_tab.
+NLTK_RESOURCES = {
+    'punkt': ['tokenizers/punkt_tab', 'tokenizers/punkt'],
+    'stopwords': ['corpora/stopwords'],
+    'wordnet': ['corpora/wordnet', 'corpora/wordnet.zip'],
+}
+
+def ensure_nltk_resources():
+    """Checks that the NLTK data we need is installed locally, without touching the network."""
+    missing = []
+    for package, paths in NLTK_RESOURCES.items():
+        for path in paths:
+            try:
+                nltk.data.find(path)
+                break
+            except LookupError:
+                continue
+        else:
+            missing.append(package)
+    if missing:
+        raise LookupError(
+            f"Missing NLTK resources: {', '.join(missing)}. "
+            f"Install them once with: python -m nltk.downloader {' '.join(missing)}"
+        )
+
+def training_hash(X, y, json_path):
+    """Hashes the training data and intent command definitions an artifact was built from."""
+    digest = hashlib.sha256()
+    digest.update(str(ARTIFACT_VERSION).encode('utf-8'))
+    digest.update(json.dumps([list(X), list(y)]).encode('utf-8'))
+    with open(json_path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
 
 class TextPreprocessor:
-    def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
+    """Tokenizes, drops stop words and lemmatizes text in a single pass.
+
+    An instance is used directly as the TfidfVectorizer analyzer, so training and
+    inference share exactly the same preprocessing and text is tokenized only once.
+    Lemmas are memoized in a bounded LRU cache since voice vocabularies are small.
+    """
+
+    WORD = re.compile(r"\w\w+")
+
+    def __init__(self, lemma_cache_size=4096):
+        ensure_nltk_resources()
+        self.stop_words = frozenset(stopwords.words('english'))
         self.lemmatizer = WordNetLemmatizer()
+        self.lemma_cache_size = lemma_cache_size
+        self._lemmatize = functools.lru_cache(maxsize=lemma_cache_size)(self.lemmatizer.lemmatize)
 
     def preprocess(self, text):
-        tokens = word_tokenize(text)
-        tokens = [word for word in tokens if word.lower() not in self.stop_words]
-        tokens = [self.lemmatizer.lemmatize(word) for word in tokens]
+        stop_words = self.stop_words
+        lemmatize = self._lemmatize
+        word = self.WORD
+        tokens = []
+        for token in word_tokenize(text.lower()):
+            if token not in stop_words and word.fullmatch(token):
+                tokens.append(lemmatize(token))
         return tokens
 
+    __call__ = preprocess
+
+    def __getstate__(self):
+        # The memo wraps a bound method and cannot be pickled; it is rebuilt on load.
+        state = self.__dict__.copy()
+        del state['_lemmatize']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lemmatize = functools.lru_cache(maxsize=self.lemma_cache_size)(self.lemmatizer.lemmatize)
+
 class IntentRecognizer:
-    def __init__(self):
-        self.model = make_pipeline(TfidfVectorizer(), MultinomialNB())
+    def __init__(self, preprocessor=None):
+        if preprocessor is None:
+            preprocessor = TextPreprocessor()
+        self.model = make_pipeline(TfidfVectorizer(analyzer=preprocessor), MultinomialNB())
 
     def train(self, X, y):
         self.model.fit(X, y)
 
+    def save(self, path, data_hash):
+        """Writes the fitted pipeline to a versioned artifact, atomically."""
+        artifact = {'version': ARTIFACT_VERSION, 'training_hash': data_hash, 'model': self.model}
+        tmp_path = path + '.tmp'
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, path)
+
+    def load(self, path, data_hash):
+        """Loads a fitted pipeline; returns False if the artifact is missing or stale."""
+        if not os.path.exists(path):
+            return False
+        try:
+            artifact = joblib.load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable intent artifact {path}: {e}")
+            return False
+        if artifact.get('version') != ARTIFACT_VERSION or artifact.get('training_hash') != data_hash:
+            return False
+        self.model = artifact['model']
+        return True
+
     def predict(self, text):
         return self.model.predict([text])[0]
 
+    def rank_many(self, texts, top_k=3):
+        """Scores a batch of texts at once, returning (intent, probability) pairs best first."""
+        probabilities = self.model.predict_proba(texts)
+        classes = self.model.classes_
+        return [
+            sorted(zip(classes, row), key=lambda pair: pair[1], reverse=True)[:top_k]
+            for row in probabilities
+        ]
+
 class EntityRecognizer:
+    # Components that entity extraction does not need; skipping them speeds up bulk runs.
+    NON_NER_COMPONENTS = ('tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter')
+
     def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
+        self._nlp = None
+
+    @property
+    def nlp(self):
+        """Loads the spaCy pipeline on first use."""
+        if self._nlp is None:
+            self._nlp = spacy.load("en_core_web_sm")
+        return self._nlp
 
     def recognize(self, text):
         doc = self.nlp(text)
         entities = [(ent.text, ent.label_) for ent in doc.ents]
         return entities
 
-class CommandExecutor:
-    def __init__(self, json_path):
-        with open(json_path, 'r') as f:
-            self.intent_commands = json.load(f)
-    
-    def execute_command(self, intent, entities=None):
-        system = platform.system().lower()
-        if intent in self.intent_commands:
-            command = self.intent_commands[intent].get(f'{system}_command')
-            if command:
-                os.system(command)
-            else:
-                print(f"No command found for {intent} on {system}")
-        else:
-            print(f"Unknown intent: {intent}")
+    def recognize_many(self, texts):
+        return list(self.recognize_stream(texts))
+
+    def recognize_stream(self, texts, batch_size=256, n_process=1, ner_only=True):
+        """Yields the entities of each text lazily using spaCy's nlp.pipe.
+
+        With ner_only the parser, tagger and lemmatizer are skipped. n_process=-1
+        uses every CPU core.
+        """
+        disable = [name for name in self.NON_NER_COMPONENTS if name in self.nlp.pipe_names] if ner_only else []
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disable):
+            yield [(ent.text, ent.label_) for ent in doc.ents]
 
 class NLU:
-    def __init__(self, json_path):
+    def __init__(self, json_path, artifact_path=DEFAULT_ARTIFACT_PATH):
+        self.json_path = json_path
+        self.artifact_path = artifact_path
         self.preprocessor = TextPreprocessor()
-        self.intent_recognizer = IntentRecognizer()
+        self.intent_recognizer = IntentRecognizer(self.preprocessor)
         self.entity_recognizer = EntityRecognizer()
         self.command_executor = CommandExecutor(json_path)
-    
+        self._training_data = None
+        self._intent_ready = False
+
     def train_intent_recognizer(self, X_train, y_train):
-        self.intent_recognizer.train(X_train, y_train)
-    
+        """Sets the training data; the pipeline is loaded or fitted on first use."""
+        self._training_data = (X_train, y_train)
+        self._intent_ready = False
+
+    def build_intent_recognizer(self, force=False):
+        """Loads the intent artifact, retraining and saving it only when the training hash changed."""
+        X, y = self._training_data or (X_train, y_train)
+        data_hash = training_hash(X, y, self.json_path)
+        if force or not self.intent_recognizer.load(self.artifact_path, data_hash):
+            self.intent_recognizer.train(X, y)
+            self.intent_recognizer.save(self.artifact_path, data_hash)
+        self._intent_ready = True
+
+    def _ensure_intent_recognizer(self):
+        if not self._intent_ready:
+            self.build_intent_recognizer()
+
     def process(self, text):
-        tokens = self.preprocessor.preprocess(text)
-        intent = self.intent_recognizer.predict(" ".join(tokens))
+        self._ensure_intent_recognizer()
+        intent = self.intent_recognizer.predict(text)
         entities = self.entity_recognizer.recognize(text)
         self.command_executor.execute_command(intent, entities)
 
+    def process_many(self, texts, top_k=3, execute=False):
+        """Processes a batch of texts (e.g. N-best ASR hypotheses) in one pass.
+
+        Returns a list of (ranked_intents, entities) per text, where ranked_intents
+        holds (intent, probability) pairs. Commands are only run when execute is True,
+        so alternative hypotheses can be scored without side effects.
+        """
+        return [
+            (ranked, entities)
+            for _, ranked, entities in self.process_stream(texts, chunk_size=max(len(texts), 1), top_k=top_k, execute=execute)
+        ]
+
+    def process_stream(self, texts, chunk_size=256, n_process=1, top_k=1, execute=False):
+        """Lazily processes an iterable of texts, such as a replayed utterance log.
+
+        The whole stream goes through a single spaCy nlp.pipe call with only NER
+        enabled, so its worker pool starts once; n_process=-1 uses every CPU core.
+        The classifier consumes the texts in chunks of chunk_size, one batch per
+        chunk, so memory stays bounded however long the input is.
+        Yields (text, ranked_intents, entities) in input order.
+        """
+        self._ensure_intent_recognizer()
+        classifier_texts, entity_texts = itertools.tee(texts)
+        entities = self.entity_recognizer.recognize_stream(entity_texts, batch_size=chunk_size, n_process=n_process)
+        try:
+            while True:
+                chunk = list(itertools.islice(classifier_texts, chunk_size))
+                if not chunk:
+                    return
+                ranked_intents = self.intent_recognizer.rank_many(chunk, top_k=top_k)
+                # zip pulls from chunk first, so entities advances exactly one doc per text.
+                for text, ranked, ents in zip(chunk, ranked_intents, entities):
+                    if execute:
+                        self.command_executor.execute_command(ranked[0][0], ents)
+                    yield text, ranked, ents
+        finally:
+            # Stops spaCy's workers when the caller finishes or abandons the stream.
+            entities.close()
+
 # Example training data
 X_train = [
     "What is the weather like in New York tomorrow?",
@@ -105,8 +276,19 @@ y_train = [
 ]
 
 if __name__ == "__main__":
-    nlu = NLU('intent_commands.json')
+    parser = argparse.ArgumentParser(description="Intent recognition demo and artifact builder.")
+    parser.add_argument('--build', action='store_true', help="retrain and save the intent artifact, then exit")
+    args = parser.parse_args()
+
+    # Build through the importable module so pickled artifacts reference NLU.*, not __main__.*
+    import NLU as nlu_module
+
+    nlu = nlu_module.NLU('intent_commands.json')
     nlu.train_intent_recognizer(X_train, y_train)
+    if args.build:
+        nlu.build_intent_recognizer(force=True)
+        print(f"Saved intent artifact to {nlu.artifact_path}")
+        raise SystemExit(0)
 
     # Example usage
     text = "What time is it?"
@@ -120,3 +302,5 @@ if __name__ == "__main__":
     
     # text = "Shutdown the computer"
     # nlu.process(text)
+
+    nlu.command_executor.shutdown()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Compares serial per-request DialoGPT generation with the micro-batching scheduler.
+
+Simulates --sessions concurrent chat sessions each sending --turns prompts. In
+"serial" mode every request runs its own generate call, one after another. In
+"batched" mode the sessions run on separate threads with DiabloChat(batching=True),
+so concurrent turns are merged into batched generate calls. Reports generated
+tokens per second and mean turn latency.
+
+Usage:
+    python benchmarks/chat_batching.py --sessions 8 --turns 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "jarvis"))
+
+from modules.chatbot import DiabloChat, load_causal_lm  # noqa: E402
+
+PROMPTS = [
+    "Hello, how are you?",
+    "What do you like to do on weekends?",
+    "Can you recommend a movie?",
+    "What is your favourite food?",
+    "Tell me something interesting.",
+    "Do you like music?",
+    "Where would you like to travel?",
+    "What did you do today?",
+]
+
+
+def run_session(chat, session, turns, tokenizer):
+    generated = 0
+    latencies = []
+    for turn in range(turns):
+        t0 = time.perf_counter()
+        response = chat.get_response(PROMPTS[(session + turn) % len(PROMPTS)])
+        latencies.append(time.perf_counter() - t0)
+        generated += len(tokenizer.encode(response)) + 1
+    return generated, latencies
+
+
+def run_mode(mode, sessions, turns, max_wait_ms, max_batch):
+    tokenizer, _ = load_causal_lm("microsoft/DialoGPT-medium")
+    chats = [DiabloChat(batching=(mode == "batched")) for _ in range(sessions)]
+    if mode == "batched":
+        chats[0].scheduler.max_wait_ms = max_wait_ms
+        chats[0].scheduler.max_batch = max_batch
+
+    start = time.perf_counter()
+    if mode == "serial":
+        results = [run_session(chat, i, turns, tokenizer) for i, chat in enumerate(chats)]
+    else:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            futures = [pool.submit(run_session, chat, i, turns, tokenizer) for i, chat in enumerate(chats)]
+            results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    tokens = sum(generated for generated, _ in results)
+    latencies = [latency for _, session_latencies in results for latency in session_latencies]
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "turns_per_session": turns,
+        "tokens_per_s": tokens / elapsed,
+        "mean_turn_ms": sum(latencies) / len(latencies) * 1000,
+        "wall_seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=8)
+    args = parser.parse_args()
+
+    # Load the model before timing either mode.
+    load_causal_lm("microsoft/DialoGPT-medium")
+    results = [
+        run_mode(mode, args.sessions, args.turns, args.max_wait_ms, args.max_batch)
+        for mode in ("serial", "batched")
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Measures DiabloChat resident memory and per-turn latency.
+
+"legacy" reproduces the old behaviour: the model is loaded twice per DiabloChat
+(once directly, once inside the conversational pipeline) and every turn runs two
+generation passes. "shared" uses the current DiabloChat, where every instance in
+the process shares one lazily loaded model and each turn runs one generate call.
+"cpu" is the shared path with the "cpu" generation profile (int8 linear layers,
+stop at sentence end). Each mode runs in its own process with two chat
+consumers, like jarvis.py and app.py living side by side, and reports resident
+memory, turn latency and generated tokens per second.
+
+Usage:
+    python benchmarks/diablo_chat.py --turns 5 --threads 4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+MODEL_NAME = "microsoft/DialoGPT-medium"
+PROMPTS = [
+    "Hello, how are you?",
+    "What do you like to do on weekends?",
+    "Can you recommend a movie?",
+    "What is your favourite food?",
+    "Tell me something interesting.",
+]
+
+
+def rss_mb():
+    """Current resident set size, falling back to peak RSS where psutil is unavailable."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class LegacyDiabloChat:
+    """The pre-refactor DiabloChat: two model copies and two generate calls per turn."""
+
+    def __init__(self):
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        self.model = AutoModelForCausalLM.from_pretrained(MODEL_NAME)
+        self.pipeline_model = AutoModelForCausalLM.from_pretrained(MODEL_NAME)
+
+    def get_response(self, prompt):
+        ids = self.tokenizer.encode(prompt + self.tokenizer.eos_token, return_tensors="pt")
+        self.pipeline_model.generate(ids, max_length=1000, pad_token_id=self.tokenizer.eos_token_id)
+        inputs = self.tokenizer(prompt, return_tensors="pt")
+        outputs = self.model.generate(**inputs, max_length=150, pad_token_id=self.tokenizer.eos_token_id)
+        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+
+def run_mode(mode, turns, threads):
+    import torch
+    if threads:
+        torch.set_num_threads(threads)
+
+    baseline_rss = rss_mb()
+    start = time.perf_counter()
+    if mode == "legacy":
+        consumers = [LegacyDiabloChat(), LegacyDiabloChat()]
+    else:
+        sys.path.insert(0, os.path.join(ROOT, "jarvis"))
+        from modules.chatbot import DiabloChat
+        profile = "cpu" if mode == "cpu" else "default"
+        consumers = [DiabloChat(profile=profile), DiabloChat(profile=profile)]
+        consumers[0].get_response("Hi")
+    load_seconds = time.perf_counter() - start
+    tokenizer = consumers[0].tokenizer
+
+    latencies = []
+    tokens = 0
+    for i in range(turns):
+        for consumer in consumers:
+            t0 = time.perf_counter()
+            response = consumer.get_response(PROMPTS[i % len(PROMPTS)])
+            latencies.append(time.perf_counter() - t0)
+            tokens += len(tokenizer.encode(response))
+
+    return {
+        "mode": mode,
+        "load_seconds": load_seconds,
+        "rss_mb": rss_mb() - baseline_rss,
+        "median_turn_ms": statistics.median(latencies) * 1000,
+        "tokens_per_s": tokens / sum(latencies),
+        "turns": len(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5, help="turns per consumer")
+    parser.add_argument("--threads", type=int, help="torch intra-op threads for every mode")
+    parser.add_argument("--modes", nargs="+", default=["legacy", "shared", "cpu"], choices=["legacy", "shared", "cpu"])
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results.append(pool.submit(run_mode, mode, args.turns, args.threads).result())
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Compares command-matching encoders on the fixed utterance set in utterances.json.
+
+For each encoder it reports top-1 accuracy of the embedding tier alone, mean
+per-utterance encode time and how often its prediction agrees with the reference
+encoder (the first one listed).
+
+Usage:
+    python benchmarks/encoder_agreement.py --encoders bert minilm
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "jarvis", "modules"))
+
+from system_commands.encoders import ENCODERS, load_encoder  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utterances.json")
+
+
+def normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def evaluate(encoder_name, catalog, texts, labels):
+    encoder = load_encoder(encoder_name)
+    encoder.load()
+    command_matrix = normalize(encoder.encode(catalog))
+
+    predictions = []
+    start = time.perf_counter()
+    for text in texts:
+        scores = command_matrix @ normalize(encoder.encode([text]))[0]
+        predictions.append(catalog[int(np.argmax(scores))])
+    elapsed = time.perf_counter() - start
+
+    correct = sum(prediction == label for prediction, label in zip(predictions, labels))
+    return predictions, {
+        "encoder": encoder_name,
+        "model": encoder.model_name,
+        "quantized": encoder.quantize,
+        "top1_accuracy": correct / len(labels),
+        "mean_latency_ms": elapsed / len(texts) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--encoders", nargs="+", default=["bert", "minilm"], choices=sorted(ENCODERS))
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, "r") as f:
+        corpus = [row for row in json.load(f) if row["label"]]
+    catalog = sorted({row["label"] for row in corpus})
+    texts = [row["text"] for row in corpus]
+    labels = [row["label"] for row in corpus]
+
+    reference = None
+    results = []
+    for name in args.encoders:
+        predictions, result = evaluate(name, catalog, texts, labels)
+        if reference is None:
+            reference = predictions
+        result["agreement_with_reference"] = sum(a == b for a, b in zip(predictions, reference)) / len(texts)
+        results.append(result)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Latency and accuracy benchmark for the command/intent resolution path.
+
+Runs the labeled corpus in utterances.json through each backend with stubbed
+executors, so no system command is ever run, and reports p50/p95/p99 latency,
+throughput, peak RSS and top-1 accuracy as JSON. Each backend runs in its own
+process so peak RSS is attributable to it.
+
+Backends:
+    script-bert     ScriptModule.match with the bert encoder
+    script-minilm   ScriptModule.match with the quantized MiniLM encoder
+    nlu             NLU.process (preprocessing, intent, entities)
+    intent          IntentRecognizer.predict
+
+Usage:
+    python benchmarks/intent_resolution.py --output results.json
+    python benchmarks/intent_resolution.py --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+CORPUS_PATH = os.path.join(BENCH_DIR, "utterances.json")
+INTENT_COMMANDS_PATH = os.path.join(ROOT, "intent_commands.json")
+
+BACKENDS = ["script-bert", "script-minilm", "nlu", "intent"]
+
+# Relative p95 latency growth and absolute accuracy drop tolerated by --compare.
+LATENCY_TOLERANCE = 0.2
+ACCURACY_TOLERANCE = 0.02
+
+
+class NullEmbeddingCache:
+    """Embedding cache that never hits, so every run measures real encoder work."""
+
+    def get(self, text):
+        return None
+
+    def put_many(self, texts, embeddings):
+        pass
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def load_corpus():
+    with open(CORPUS_PATH, "r") as f:
+        return json.load(f)
+
+
+def intent_labels():
+    """Maps command phrases in the corpus to intent names from intent_commands.json."""
+    sys.path.insert(0, os.path.join(ROOT, "jarvis", "modules"))
+    from system_commands.matcher import camel_to_phrase
+
+    with open(INTENT_COMMANDS_PATH, "r") as f:
+        return {camel_to_phrase(name): name for name in json.load(f)}
+
+
+def build_script_resolver(encoder):
+    sys.path.insert(0, os.path.join(ROOT, "jarvis", "modules"))
+    from system_commands.commands import ScriptModule
+
+    module = ScriptModule(encoder=encoder, embedding_cache=NullEmbeddingCache(),
+                          intent_commands_path=INTENT_COMMANDS_PATH, os_name="Darwin")
+    for command in module.command_mapping:
+        module.command_mapping[command] = lambda *args, **kwargs: None
+    module.match(next(iter(module.command_mapping)) + " warm up")
+
+    def resolve(text):
+        match = module.match(text)
+        return match.command if match else None
+
+    return resolve, None
+
+
+def build_nlu_resolver():
+    sys.path.insert(0, ROOT)
+    import NLU
+
+    nlu = NLU.NLU(INTENT_COMMANDS_PATH)
+    nlu.train_intent_recognizer(NLU.X_train, NLU.y_train)
+    predicted = []
+    nlu.command_executor.execute_command = lambda intent, entities=None: predicted.append(intent)
+
+    def resolve(text):
+        nlu.process(text)
+        return predicted.pop()
+
+    return resolve, intent_labels()
+
+
+def build_intent_resolver():
+    sys.path.insert(0, ROOT)
+    import NLU
+
+    recognizer = NLU.IntentRecognizer()
+    recognizer.train(NLU.X_train, NLU.y_train)
+    return recognizer.predict, intent_labels()
+
+
+def run_backend(backend, repeat):
+    corpus = load_corpus()
+    if backend == "script-bert":
+        resolve, label_map = build_script_resolver("bert")
+    elif backend == "script-minilm":
+        resolve, label_map = build_script_resolver("minilm")
+    elif backend == "nlu":
+        resolve, label_map = build_nlu_resolver()
+    elif backend == "intent":
+        resolve, label_map = build_intent_resolver()
+    else:
+        raise ValueError(f"Unsupported backend: {backend}")
+
+    # Intent backends classify into intent names and cannot reject chit-chat.
+    if label_map is not None:
+        corpus = [dict(row, label=label_map[row["label"]]) for row in corpus if row["label"] in label_map]
+
+    latencies = []
+    correct = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in corpus:
+            t0 = time.perf_counter()
+            prediction = resolve(row["text"])
+            latencies.append(time.perf_counter() - t0)
+            correct += prediction == row["label"]
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "backend": backend,
+        "utterances": len(latencies),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "throughput_per_s": len(latencies) / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "top1_accuracy": correct / len(latencies),
+    }
+
+
+def compare(results, baseline):
+    """Returns human-readable regressions of results against a stored baseline."""
+    previous = {entry["backend"]: entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        old = previous.get(entry["backend"])
+        if old is None:
+            continue
+        if entry["p95_ms"] > old["p95_ms"] * (1 + LATENCY_TOLERANCE):
+            regressions.append(f"{entry['backend']}: p95 {old['p95_ms']:.2f} ms -> {entry['p95_ms']:.2f} ms")
+        if entry["top1_accuracy"] < old["top1_accuracy"] - ACCURACY_TOLERANCE:
+            regressions.append(
+                f"{entry['backend']}: accuracy {old['top1_accuracy']:.3f} -> {entry['top1_accuracy']:.3f}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus per backend")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored results file")
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results.append(pool.submit(run_backend, backend, args.repeat).result())
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare(results, json.load(f))
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
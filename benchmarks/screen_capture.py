@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Measures screen capture latency and per-frame allocations.
+
+Modes:
+    legacy      a new mss context per capture plus Image.frombytes, as the
+                screen tools used to do
+    array       ScreenCapturer.grab() with the persistent grabber, reading the
+                BGRA frame as a NumPy view
+    pil         ScreenCapturer.grab().to_pil()
+    ring        the background ring buffer at --fps; reports the achieved rate
+                and the latency of latest()
+
+Allocations are traced with tracemalloc per capture; "alloc_kb" is the mean
+memory allocated by one capture, and "peak_kb" the largest peak seen.
+Requires a display.
+
+Usage:
+    python benchmarks/screen_capture.py --captures 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import mss
+from PIL import Image
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from screen_capture import ScreenCapturer  # noqa: E402
+
+MODES = ["legacy", "array", "pil", "ring"]
+
+
+def legacy_capture():
+    with mss.mss() as sct:
+        sct_img = sct.grab(sct.monitors[1])
+        return Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
+
+
+def measure(capture, captures):
+    capture()  # warm up: opens the grabber and loads decoders outside the timed loop
+    latencies, allocated, peaks = [], [], []
+    tracemalloc.start()
+    for _ in range(captures):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        t0 = time.perf_counter()
+        frame = capture()
+        latencies.append(time.perf_counter() - t0)
+        after, peak = tracemalloc.get_traced_memory()
+        allocated.append(after - before)
+        peaks.append(peak - before)
+        del frame
+    tracemalloc.stop()
+    return latencies, allocated, peaks
+
+
+def summarize(mode, latencies, allocated, peaks, **extra):
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "mode": mode,
+        "captures": len(latencies),
+        "p50_ms": statistics.median(latencies_ms),
+        "p95_ms": latencies_ms[min(int(0.95 * len(latencies_ms)), len(latencies_ms) - 1)],
+        "alloc_kb": statistics.mean(allocated) / 1024,
+        "peak_kb": max(peaks) / 1024,
+        **extra,
+    }
+
+
+def run_mode(mode, captures, fps, buffer_size):
+    if mode == "legacy":
+        return summarize(mode, *measure(legacy_capture, captures))
+
+    capturer = ScreenCapturer(fps=fps, buffer_size=buffer_size if mode == "ring" else 0)
+    try:
+        if mode == "array":
+            return summarize(mode, *measure(lambda: capturer.grab().array, captures))
+        if mode == "pil":
+            return summarize(mode, *measure(lambda: capturer.grab().to_pil(), captures))
+
+        capturer.start()
+        duration = captures / fps
+        time.sleep(duration)
+        grabbed = capturer.captures
+        results = measure(capturer.latest, captures)
+        return summarize(mode, *results, target_fps=fps, achieved_fps=grabbed / duration)
+    finally:
+        capturer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--captures", type=int, default=30)
+    parser.add_argument("--fps", type=float, default=5.0, help="background capture rate for the ring mode")
+    parser.add_argument("--buffer-size", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    args = parser.parse_args()
+
+    results = [run_mode(mode, args.captures, args.fps, args.buffer_size) for mode in args.modes]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
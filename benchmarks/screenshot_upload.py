@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Compares screenshot upload settings for gemini.analyze_image_with_gemini.
+
+Runs every image in --screenshots through each preparation setting and reports
+payload bytes and encode time. Unless --offline is given, each prepared image
+is also sent to Gemini to measure round-trip latency and description quality.
+
+Quality is measured two ways:
+- overlap: the Jaccard similarity of each description's words with the
+  description of the unmodified capture;
+- key-phrase recall: when --reference is given, the fraction of expected
+  phrases the description mentions. The reference file is a JSON object
+  mapping file names to lists of phrases, e.g. {"editor.png": ["File", "Terminal"]}.
+
+Usage:
+    python benchmarks/screenshot_upload.py --screenshots shots/ --offline
+    python benchmarks/screenshot_upload.py --screenshots shots/ --reference shots/reference.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from PIL import Image
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import gemini  # noqa: E402
+
+SETTINGS = {
+    "raw": None,
+    "jpeg-1600": {"max_long_edge": 1600, "format": "JPEG", "quality": 80},
+    "webp-1600": {"max_long_edge": 1600, "format": "WEBP", "quality": 80},
+    "jpeg-1280-gray": {"max_long_edge": 1280, "grayscale": True, "format": "JPEG", "quality": 75},
+}
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+
+def words(text):
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def overlap(text, baseline):
+    a, b = words(text), words(baseline)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def recall(text, phrases):
+    text = text.lower()
+    return sum(phrase.lower() in text for phrase in phrases) / len(phrases) if phrases else None
+
+
+def raw_payload_bytes(image):
+    """Size of the PNG the Gemini client would upload for an unmodified PIL image."""
+    _, info = gemini.prepare_image(image, max_long_edge=None, format="PNG")
+    return info["payload_bytes"], info["encode_ms"]
+
+
+def run(screenshots, reference, prompt, offline):
+    rows = {name: [] for name in SETTINGS}
+    for path in screenshots:
+        image = Image.open(path).convert("RGB")
+        baseline = None
+        for name, prep in SETTINGS.items():
+            if prep is None:
+                payload_bytes, encode_ms = raw_payload_bytes(image)
+            else:
+                _, info = gemini.prepare_image(image, **prep)
+                payload_bytes, encode_ms = info["payload_bytes"], info["encode_ms"]
+            row = {"file": os.path.basename(path), "payload_bytes": payload_bytes, "encode_ms": encode_ms}
+            if not offline:
+                start = time.perf_counter()
+                description = gemini.analyze_image_with_gemini(image, prompt=prompt, image_prep=prep)
+                row["round_trip_ms"] = (time.perf_counter() - start) * 1000
+                if baseline is None:
+                    baseline = description
+                row["overlap"] = overlap(description, baseline)
+                if reference is not None:
+                    row["recall"] = recall(description, reference.get(row["file"], []))
+            rows[name].append(row)
+    return rows
+
+
+def summarize(rows):
+    summary = []
+    for name, entries in rows.items():
+        entry = {"setting": name}
+        for key in ("payload_bytes", "encode_ms", "round_trip_ms", "overlap", "recall"):
+            values = [row[key] for row in entries if row.get(key) is not None]
+            if values:
+                entry[f"mean_{key}"] = statistics.mean(values)
+        summary.append(entry)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--screenshots", required=True, help="directory of screenshots")
+    parser.add_argument("--reference", help="JSON file of expected phrases per screenshot")
+    parser.add_argument("--prompt", default="Describe in detail what is visible on this screen, "
+                                            "including text, icons, and window layout.")
+    parser.add_argument("--offline", action="store_true", help="only measure payload size and encode time")
+    parser.add_argument("--details", action="store_true", help="print per-screenshot rows as well")
+    args = parser.parse_args()
+
+    screenshots = sorted(
+        os.path.join(args.screenshots, name) for name in os.listdir(args.screenshots)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not screenshots:
+        sys.exit(f"No screenshots found in {args.screenshots}")
+    reference = None
+    if args.reference:
+        with open(args.reference, "r") as f:
+            reference = json.load(f)
+    if not args.offline and not gemini.configure_gemini():
+        sys.exit("Gemini is not configured; set GEMINI_API_KEY or pass --offline")
+
+    rows = run(screenshots, reference, args.prompt, args.offline)
+    output = {"summary": summarize(rows)}
+    if args.details:
+        output["rows"] = rows
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
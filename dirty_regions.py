@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dirty Region Detection Module
+
+Compares screen frames with a baseline tile by tile with NumPy, merges the changed
+tiles into bounding rectangles, and decides whether a change is small enough
+to analyse just the changed region instead of the whole screen.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# rects: merged changed rectangles as (left, top, right, bottom) pixel boxes
+# bbox: the union of rects, or None when nothing changed
+# changed_fraction: share of the screen covered by bbox
+# partial: True when bbox is small enough to analyse on its own
+FrameChange = namedtuple("FrameChange", ["rects", "bbox", "changed_fraction", "partial"])
+
+def changed_tiles(previous, current, tile_size=32, pixel_threshold=24, stride=2):
+    """
+    Returns a boolean grid with one cell per tile_size x tile_size tile, True where
+    the mean per-pixel difference (summed over colour channels) exceeds pixel_threshold.
+    Frames are H x W (x C) uint8 arrays of the same shape; partial edge tiles count.
+    Only every stride-th pixel in each direction is compared; tile_size must be a
+    multiple of stride.
+    """
+    previous, current = previous[::stride, ::stride], current[::stride, ::stride]
+    if current.ndim == 2:
+        previous, current = previous[..., None], current[..., None]
+    # Only the first three channels carry colour; mss's fourth BGRA byte is padding.
+    previous, current = previous[..., :3], current[..., :3]
+    diff = np.abs(np.subtract(current, previous, dtype=np.int16))
+    tile_size //= stride
+    height, width, channels = diff.shape
+    rows, cols = -(-height // tile_size), -(-width // tile_size)
+    if height % tile_size or width % tile_size:
+        diff = np.pad(diff, ((0, rows * tile_size - height), (0, cols * tile_size - width), (0, 0)))
+    # Channels are summed together with the tile's pixels in one reduction.
+    sums = diff.reshape(rows, tile_size, cols, tile_size * channels).sum(axis=(1, 3))
+
+    # Edge tiles are averaged over the pixels they actually cover.
+    counts = np.full((rows, cols), tile_size * tile_size, dtype=np.int64)
+    if height % tile_size:
+        counts[-1, :] = (height % tile_size) * tile_size
+    if width % tile_size:
+        counts[:, -1] = counts[:, -1] // tile_size * (width % tile_size)
+    return sums > pixel_threshold * counts
+
+def merge_tiles(mask, tile_size, frame_size, padding=0):
+    """
+    Groups 8-connected changed tiles and returns their bounding rectangles in pixels,
+    grown by padding and merged until none overlap.
+    """
+    width, height = frame_size
+    seen = np.zeros_like(mask, dtype=bool)
+    rects = []
+    for row, col in zip(*(indices.tolist() for indices in np.nonzero(mask))):
+        if seen[row, col]:
+            continue
+        seen[row, col] = True
+        stack = [(row, col)]
+        top, left, bottom, right = row, col, row, col
+        while stack:
+            r, c = stack.pop()
+            top, left, bottom, right = min(top, r), min(left, c), max(bottom, r), max(right, c)
+            for nr in range(max(r - 1, 0), min(r + 2, mask.shape[0])):
+                for nc in range(max(c - 1, 0), min(c + 2, mask.shape[1])):
+                    if mask[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        stack.append((nr, nc))
+        rects.append((
+            max(left * tile_size - padding, 0),
+            max(top * tile_size - padding, 0),
+            min((right + 1) * tile_size + padding, width),
+            min((bottom + 1) * tile_size + padding, height),
+        ))
+    return _merge_overlapping(rects)
+
+def _merge_overlapping(rects):
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for rect in rects:
+            for i, other in enumerate(result):
+                if rect[0] < other[2] and other[0] < rect[2] and rect[1] < other[3] and other[1] < rect[3]:
+                    result[i] = (min(rect[0], other[0]), min(rect[1], other[1]),
+                                 max(rect[2], other[2]), max(rect[3], other[3]))
+                    merged = True
+                    break
+            else:
+                result.append(rect)
+        rects = result
+    return rects
+
+def union_box(rects):
+    return (min(r[0] for r in rects), min(r[1] for r in rects),
+            max(r[2] for r in rects), max(r[3] for r in rects))
+
+class DirtyRegionTracker:
+    """
+    Tracks changes against a baseline frame, normally the last frame analysed.
+
+    diff() compares a frame with the baseline without moving it, and commit()
+    makes a frame the new baseline. A change with no bbox means no tile changed.
+    A change is partial when the union of the changed rectangles covers at most
+    max_changed_fraction of the screen; larger changes, a missing baseline and
+    frames of a new size count as full.
+    """
+
+    def __init__(self, tile_size=32, pixel_threshold=24, max_changed_fraction=0.25, padding=16, stride=2):
+        self.tile_size = tile_size
+        self.pixel_threshold = pixel_threshold
+        self.stride = stride
+        self.max_changed_fraction = max_changed_fraction
+        self.padding = padding
+        self._baseline = None
+
+    def diff(self, frame):
+        """Returns the FrameChange from the baseline to frame (an H x W x C array or PIL image)."""
+        frame = np.asarray(frame)
+        baseline = self._baseline
+        height, width = frame.shape[:2]
+        if baseline is None or baseline.shape != frame.shape:
+            return FrameChange([(0, 0, width, height)], (0, 0, width, height), 1.0, False)
+
+        mask = changed_tiles(baseline, frame, self.tile_size, self.pixel_threshold, self.stride)
+        if not mask.any():
+            return FrameChange([], None, 0.0, False)
+        rects = merge_tiles(mask, self.tile_size, (width, height), self.padding)
+        bbox = union_box(rects)
+        fraction = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) / (width * height)
+        return FrameChange(rects, bbox, fraction, fraction <= self.max_changed_fraction)
+
+    def commit(self, frame):
+        """Makes frame the baseline that later frames are compared with."""
+        self._baseline = np.asarray(frame)
+
+    def reset(self):
+        """Forgets the baseline, so the next diff reports a full change."""
+        self._baseline = None
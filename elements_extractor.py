@@ -30,8 +30,6 @@ Usage:
 """
 
 import mss
-import mss.tools
-from PIL import Image
 import time
 import sys
 import platform
@@ -48,6 +46,10 @@ except ImportError:
     print("ERROR: Cannot find 'gemini.py'. Ensure it's in the same directory.")
     sys.exit(1)
 
+from dirty_regions import DirtyRegionTracker
+from screen_capture import get_capturer
+from screen_dedupe import ScreenResultCache
+
 # Import the GUI automation library
 try:
     import pyautogui
@@ -80,6 +82,13 @@ CAPTURE_INTERVAL_SECONDS = 15
 POPUP_WIDTH = 500
 POPUP_HEIGHT = 400
 FONT_SIZE = 10
+# Reuse the last description while the screen's 16 x 16 dhash (256 bits) stays within this many bits
+# of an analysed capture; see ScreenResultCache for why the grid is that fine
+DEDUPE_HASH_SIZE = 16
+DEDUPE_MAX_DISTANCE = 3
+DEDUPE_TTL_SECONDS = 300
+# Send only the changed region when it covers at most this fraction of the screen
+DIRTY_MAX_CHANGED_FRACTION = 0.25
 
 # PyAutoGUI Configuration
 pyautogui.PAUSE = 0.5
@@ -89,24 +98,59 @@ print(f"INFO: PyAutoGUI Failsafe enabled. Move mouse to a screen corner to stop.
 # --- Global flag to signal exit ---
 continue_running = True
 
+# --- Cache of descriptions for unchanged screens ---
+screen_cache = ScreenResultCache(max_distance=DEDUPE_MAX_DISTANCE, ttl=DEDUPE_TTL_SECONDS, hash_size=DEDUPE_HASH_SIZE)
+
+# --- Changed-region tracking between scans ---
+dirty_tracker = DirtyRegionTracker(max_changed_fraction=DIRTY_MAX_CHANGED_FRACTION)
+last_description = None
+last_description_time = 0.0
+
 # --- Image Preprocessing Function ---
 def preprocess_image_for_display(pil_image):
     return pil_image
 
+# --- Incremental Analysis Function ---
+def analyze_changes(img_pil, change):
+    """Analyses only the changed region when the change is small, otherwise the whole screen."""
+    if change.partial and last_description:
+        print(f"INFO: {change.changed_fraction:.1%} of the screen changed, analysing region {change.bbox} only.")
+        return gemini.analyze_region_with_gemini(img_pil, change.bbox, last_description)
+    return gemini.analyze_image_with_gemini(img_pil)
+
 # --- Core Capture and Analyze Function ---
 def capture_and_analyze_screen():
-    global continue_running
+    global continue_running, last_description, last_description_time
     if not continue_running: return None
     try:
-        with mss.mss() as sct:
-            if len(sct.monitors) < 2: return "Error: No primary monitor found."
-            monitor = sct.monitors[1]
-            sct_img = sct.grab(monitor)
-            img_pil = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
+        frame = get_capturer().grab()
+        img_pil = frame.to_pil()
     except mss.ScreenShotError as ex: return f"Error during capture: {ex}"
     except Exception as e: return f"General Capture Error: {e}"
 
-    description = gemini.analyze_image_with_gemini(img_pil)
+    # Diff against the frame last_description describes; the tile diff reads the BGRA buffer directly.
+    # With no changed tiles the description still holds, for up to DEDUPE_TTL_SECONDS like the hash cache.
+    change = dirty_tracker.diff(frame.array)
+    fresh = time.time() - last_description_time < DEDUPE_TTL_SECONDS
+    if change.bbox is None and last_description is not None and fresh:
+        print("INFO: No tiles changed since the last analysis, reusing its description.")
+        return last_description
+
+    analysed = []
+    def analyze(image):
+        analysed.append(True)
+        return analyze_changes(image, change)
+
+    # Fall back to the hash cache, e.g. when switching back to a screen analysed earlier
+    description = screen_cache.get_or_compute(img_pil, analyze,
+                                              cacheable=lambda text: not gemini.is_error_response(text))
+    if not analysed:
+        print(f"INFO: Screen matches an earlier capture, reusing its description. Dedupe stats: {screen_cache.stats()}")
+    elif not gemini.is_error_response(description):
+        # Only a fresh analysis describes this exact frame, so only it moves the diff baseline.
+        dirty_tracker.commit(frame.array)
+        last_description = description
+        last_description_time = time.time()
     if "Error: Invalid Gemini API Key." in description or "Error: Gemini API not configured." in description:
          continue_running = False
     return description
@@ -276,5 +320,7 @@ if __name__ == "__main__":
     try:
         root.mainloop()
     except Exception as e: print(f"An unexpected error occurred in the main loop: {e}")
-    finally: print("--- Script Finished ---")
+    finally:
+        print(f"Screen dedupe stats: {screen_cache.stats()}")
+        print("--- Script Finished ---")
 
@@ -9,6 +9,8 @@ for analysis using a multimodal model.
 """
 
 import os
+import threading
+import time
 import google.generativeai as genai
 from PIL import Image
 import io
@@ -19,12 +21,154 @@ load_dotenv()
 # or a secure configuration file, NOT hardcoded here.
 API_KEY = os.getenv("GEMINI_API_KEY")
 
+DEFAULT_MODEL_NAME = 'gemini-2.0-flash'
+DEFAULT_PROMPT = "Describe in detail what is visible on this screen, including text, icons, and window layout."
+
+# Sent with a crop of the changed part of the screen, so Gemini can update its
+# previous description instead of re-reading the whole screen.
+REGION_PROMPT_TEMPLATE = (
+    "Earlier, this screen was described as follows:\n{previous}\n\n"
+    "The attached image shows only the part of the screen that has changed since then: "
+    "pixels ({left}, {top}) to ({right}, {bottom}) of a {width}x{height} screen. "
+    "Everything outside this region is unchanged. Combining the earlier description with "
+    "the changed region, respond to the following for the whole screen:\n{prompt}"
+)
+
+# Screenshots are downscaled and compressed before upload. A 4K capture sent as-is
+# is several MB; at a 1600 px long edge as JPEG it is typically 150-400 KB.
+# Grayscale shrinks text-heavy screens further when colour does not matter.
+DEFAULT_IMAGE_PREP = {"max_long_edge": 1600, "grayscale": False, "format": "JPEG", "quality": 80}
+IMAGE_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
 # --- Module State ---
 is_configured = False
 
-def configure_gemini():
+# GenerativeModel handles keyed by (model name, generation config), reused across calls.
+_model_cache = {}
+_model_cache_lock = threading.Lock()
+_setup_stats = {"calls": 0, "handle_misses": 0, "setup_seconds_total": 0.0, "last_setup_ms": 0.0, "max_setup_ms": 0.0}
+_image_stats = {"images": 0, "payload_bytes_total": 0, "encode_seconds_total": 0.0, "last": None}
+
+def _config_key(generation_config):
+    """Turns a generation config dict into a hashable cache key."""
+    if not generation_config:
+        return None
+    return tuple(sorted((key, repr(value)) for key, value in dict(generation_config).items()))
+
+def get_model(model_name=DEFAULT_MODEL_NAME, generation_config=None):
+    """
+    Returns the cached GenerativeModel for this model name and generation config,
+    creating it on first use.
+    """
+    key = (model_name, _config_key(generation_config))
+    with _model_cache_lock:
+        model = _model_cache.get(key)
+        if model is None:
+            model = genai.GenerativeModel(model_name, generation_config=generation_config)
+            _model_cache[key] = model
+            _setup_stats["handle_misses"] += 1
+        return model
+
+def warm_up(model_name=DEFAULT_MODEL_NAME, generation_config=None):
+    """
+    Primes the model handle and the API connection with a cheap token-count request,
+    so the first real analysis does not pay for connection setup.
+    Returns True if the request succeeded.
+    """
+    try:
+        get_model(model_name, generation_config).count_tokens("ping")
+        return True
+    except Exception as e:
+        print(f"WARN: Gemini warm-up request failed: {e}")
+        return False
+
+def get_stats():
+    """
+    Returns per-call client setup timing for analyze_image_with_gemini: the number
+    of calls, how many had to create a model handle, and mean/last/max setup time in ms.
+    Under "image" it reports upload payload size and encode time, mean and last call.
+    """
+    with _model_cache_lock:
+        stats = dict(_setup_stats)
+        image_stats = dict(_image_stats)
+    calls = stats.pop("calls")
+    total = stats.pop("setup_seconds_total")
+    stats.update(calls=calls, cached_handles=len(_model_cache),
+                 mean_setup_ms=total / calls * 1000 if calls else 0.0)
+    images = image_stats["images"]
+    stats["image"] = {
+        "images": images,
+        "mean_payload_bytes": image_stats["payload_bytes_total"] / images if images else 0.0,
+        "mean_encode_ms": image_stats["encode_seconds_total"] / images * 1000 if images else 0.0,
+        "last": image_stats["last"],
+    }
+    return stats
+
+def is_error_response(text):
+    """
+    True for the error and blocked-response strings analyze_image_with_gemini
+    returns instead of a description; these should not be cached.
+    """
+    return not text or text.startswith(("Error", "[Gemini"))
+
+def prepare_image(pil_image, max_long_edge=1600, grayscale=False, format="JPEG", quality=80):
+    """
+    Downscales and encodes a screenshot for upload.
+
+    Args:
+        pil_image (PIL.Image.Image): The captured image.
+        max_long_edge (int, optional): Longest side in pixels after resizing; None keeps the size.
+        grayscale (bool): Convert to grayscale, useful for text-heavy prompts.
+        format (str): "JPEG", "WEBP" or "PNG".
+        quality (int): Encoder quality for JPEG and WebP (1-100).
+
+    Returns:
+        tuple: (blob, info) where blob is a {"mime_type", "data"} dict accepted by
+        generate_content, and info holds the original and final size, payload bytes
+        and encode time in ms.
+    """
+    format = format.upper()
+    if format not in IMAGE_MIME_TYPES:
+        raise ValueError(f"Unsupported image format: {format}")
+    start = time.perf_counter()
+    original_size = pil_image.size
+    image = pil_image
+    if max_long_edge and max(image.size) > max_long_edge:
+        scale = max_long_edge / max(image.size)
+        target = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        # reducing_gap first shrinks by an integer factor, which keeps LANCZOS fast on 4K captures.
+        image = image.resize(target, Image.LANCZOS, reducing_gap=3.0)
+    if grayscale:
+        image = image.convert("L")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    if format == "PNG":
+        image.save(buffer, format=format, optimize=False)
+    else:
+        image.save(buffer, format=format, quality=quality)
+    data = buffer.getvalue()
+    info = {
+        "original_size": original_size,
+        "size": image.size,
+        "format": format,
+        "payload_bytes": len(data),
+        "encode_ms": (time.perf_counter() - start) * 1000,
+    }
+    return {"mime_type": IMAGE_MIME_TYPES[format], "data": data}, info
+
+def _record_image(info):
+    with _model_cache_lock:
+        _image_stats["images"] += 1
+        _image_stats["payload_bytes_total"] += info["payload_bytes"]
+        _image_stats["encode_seconds_total"] += info["encode_ms"] / 1000
+        _image_stats["last"] = info
+
+def configure_gemini(warm=True):
     """
     Configures the Gemini API using the API key from environment variables.
+    With warm=True, also creates the default model handle and primes the connection.
     Returns True if successful, False otherwise.
     """
     global is_configured
@@ -40,19 +184,25 @@ def configure_gemini():
         genai.configure(api_key=API_KEY)
         is_configured = True
         print("INFO: Gemini API configured successfully.")
+        if warm:
+            warm_up()
         return True
     except Exception as e:
         print(f"ERROR: Failed to configure Gemini API: {e}")
         is_configured = False
         return False
 
-def analyze_image_with_gemini(pil_image, prompt="Describe in detail what is visible on this screen, including text, icons, and window layout."):
+def analyze_image_with_gemini(pil_image, prompt=DEFAULT_PROMPT,
+                              model_name=DEFAULT_MODEL_NAME, generation_config=None, image_prep=DEFAULT_IMAGE_PREP):
     """
     Sends a PIL image to the configured Gemini multimodal model and returns the description.
 
     Args:
         pil_image (PIL.Image.Image): The image captured from the screen.
         prompt (str): The prompt to guide the Gemini model's analysis.
+        model_name (str): The Gemini model to use.
+        generation_config (dict, optional): Generation settings; each distinct config gets its own cached handle.
+        image_prep (dict, optional): Keyword arguments for prepare_image; None uploads the image unchanged.
 
     Returns:
         str: The text description generated by Gemini, or an error message.
@@ -64,13 +214,26 @@ def analyze_image_with_gemini(pil_image, prompt="Describe in detail what is visi
             return "Error: Gemini API not configured. Check API key setup."
 
     try:
-        # Select the multimodal model
-        # Use gemini-1.5-flash-latest or gemini-1.5-pro-latest if available and preferred
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        # Reuse the cached model handle; only the first call per model/config creates one
+        setup_start = time.perf_counter()
+        model = get_model(model_name, generation_config)
+        setup_seconds = time.perf_counter() - setup_start
+        with _model_cache_lock:
+            _setup_stats["calls"] += 1
+            _setup_stats["setup_seconds_total"] += setup_seconds
+            _setup_stats["last_setup_ms"] = setup_seconds * 1000
+            _setup_stats["max_setup_ms"] = max(_setup_stats["max_setup_ms"], setup_seconds * 1000)
+
+        # Downscale and compress the screenshot; the payload size and encode time are
+        # recorded for get_stats()
+        image_part = pil_image
+        if image_prep is not None:
+            image_part, image_info = prepare_image(pil_image, **image_prep)
+            _record_image(image_info)
 
         # Generate content using the prompt and the image
-        # The google-generativeai library >= 0.3.0 supports passing PIL Images directly
-        response = model.generate_content([prompt, pil_image])
+        # The google-generativeai library >= 0.3.0 supports passing PIL Images and blob dicts directly
+        response = model.generate_content([prompt, image_part])
 
         # Basic check for response content vs. safety blocks/errors
         if response.parts:
@@ -104,6 +267,28 @@ def analyze_image_with_gemini(pil_image, prompt="Describe in detail what is visi
              return "Error: Invalid Gemini API Key."
         return f"Error during Gemini analysis: {error_message}"
 
+def analyze_region_with_gemini(pil_image, bbox, previous_description, prompt=DEFAULT_PROMPT, **kwargs):
+    """
+    Sends only the changed region of a screen to Gemini, with the previous
+    description of the full screen as context, and returns the updated description.
+
+    Args:
+        pil_image (PIL.Image.Image): The full current capture.
+        bbox (tuple): The changed region as (left, top, right, bottom) pixels.
+        previous_description (str): Gemini's description of the screen before the change.
+        prompt (str): The original request, answered for the whole screen.
+        **kwargs: Passed on to analyze_image_with_gemini.
+
+    Returns:
+        str: The text description generated by Gemini, or an error message.
+    """
+    left, top, right, bottom = bbox
+    region_prompt = REGION_PROMPT_TEMPLATE.format(
+        previous=previous_description, left=left, top=top, right=right, bottom=bottom,
+        width=pil_image.width, height=pil_image.height, prompt=prompt,
+    )
+    return analyze_image_with_gemini(pil_image.crop(bbox), prompt=region_prompt, **kwargs)
+
 if __name__ == '__main__':
     # Example usage if run directly (requires a sample image named 'test_screen.png')
     print("Testing Gemini Analyzer Module...")
@@ -115,6 +300,7 @@ if __name__ == '__main__':
             print("\n--- Gemini Analysis ---")
             print(description)
             print("-----------------------\n")
+            print(f"Client setup stats: {get_stats()}")
         except FileNotFoundError:
             print("ERROR: Test image 'test_screen.png' not found. Cannot run direct test.")
         except Exception as e:
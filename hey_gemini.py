@@ -30,7 +30,8 @@ import time
 import sys
 import platform
 import mss
-from PIL import Image
+
+from screen_capture import get_capturer
 
 # Import the Gemini analyzer module
 try:
@@ -116,16 +117,9 @@ def capture_and_analyze_screen_for_voice():
     """Captures screen, sends to Gemini for analysis, returns description."""
     print("Capturing screen...")
     try:
-        with mss.mss() as sct:
-            # Ensure there's at least one monitor besides the aggregate 'all' monitor
-            if len(sct.monitors) < 2:
-                return "Error: No primary monitor found."
-            # Use the first physical monitor (index 1)
-            monitor = sct.monitors[1]
-            sct_img = sct.grab(monitor)
-            # Convert to PIL Image for the analyzer module
-            img_pil = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-            print("Screen captured.")
+        # The shared capturer keeps its grabber open between captures (primary monitor)
+        img_pil = get_capturer().grab().to_pil()
+        print("Screen captured.")
     except mss.ScreenShotError as ex:
         print(f"ERROR during screen capture: {ex}")
         return f"Error during capture: {ex}"
@@ -185,12 +179,8 @@ def run_voice_assistant():
                 
                 if description and "error" not in description.lower():
                     # Send the original question along with the screen capture to Gemini
-                    img_pil = None
-                    with mss.mss() as sct:
-                        monitor = sct.monitors[1]
-                        sct_img = sct.grab(monitor)
-                        img_pil = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-                    
+                    img_pil = get_capturer().grab().to_pil()
+
                     # Customize prompt for question answering
                     answer = gemini.analyze_image_with_gemini(
                         img_pil,
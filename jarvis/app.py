@@ -25,6 +25,7 @@ class LoadingThread(QThread):
                 self.msleep(100)
 
 class ResponseThread(QThread):
+    partial_response = pyqtSignal(str)
     response_ready = pyqtSignal(str)
 
     def __init__(self, user_msg):
@@ -32,11 +33,14 @@ class ResponseThread(QThread):
         self.user_msg = user_msg
 
     def run(self):
+        answer = ""
         try:
-            answer = chatbot.get_response(self.user_msg)
+            for chunk in chatbot.get_response_stream(self.user_msg):
+                answer += chunk
+                self.partial_response.emit(answer)
         except Exception as e:
             answer = f"Error: {str(e)}"
-        self.response_ready.emit(answer)
+        self.response_ready.emit(answer.strip())
 
 class VoiceInputThread(QThread):
     voice_input_ready = pyqtSignal(str)
@@ -145,31 +149,39 @@ class ChatApplication(QMainWindow):
     def generate_response(self, user_msg):
         self.loading_message_id = self.chat_area.toPlainText().count('\n') + 1
         self.chat_area.append("Bot: ⠋")
+        self.bot_message_start = self.chat_area.document().lastBlock().position()
         self.loading_thread.start()
         
         # Call the custom chatbot API to get a response in a separate thread
         self.response_thread = ResponseThread(user_msg)
+        self.response_thread.partial_response.connect(self.update_partial_response)
         self.response_thread.response_ready.connect(self.insert_response)
         self.response_thread.start()
 
-    def update_loading_animation(self, wave):
+    def replace_bot_message(self, text):
+        # Rewrite everything from the start of the bot's message, which may span several lines
         cursor = self.chat_area.textCursor()
-        cursor.movePosition(cursor.End, cursor.MoveAnchor)
-        cursor.select(cursor.LineUnderCursor)
+        cursor.setPosition(self.bot_message_start, cursor.MoveAnchor)
+        cursor.movePosition(cursor.End, cursor.KeepAnchor)
         cursor.removeSelectedText()
-        cursor.insertText(f"Bot: {wave}")
+        cursor.insertText(f"Bot: {text}")
         self.chat_area.setTextCursor(cursor)
 
-    def insert_response(self, response):
+    def stop_loading_animation(self):
         self.loading_thread.loading = False
         self.loading_thread.quit()
-        
-        cursor = self.chat_area.textCursor()
-        cursor.movePosition(cursor.End, cursor.MoveAnchor)
-        cursor.select(cursor.LineUnderCursor)
-        cursor.removeSelectedText()
-        cursor.insertText(f"Bot: {response}")
-        self.chat_area.setTextCursor(cursor)
+
+    def update_loading_animation(self, wave):
+        if self.loading_thread.loading:
+            self.replace_bot_message(wave)
+
+    def update_partial_response(self, partial):
+        self.stop_loading_animation()
+        self.replace_bot_message(partial)
+
+    def insert_response(self, response):
+        self.stop_loading_animation()
+        self.replace_bot_message(response)
 
         # Speak the response
         talk_module.speak(response)
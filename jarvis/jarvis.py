@@ -1,20 +1,70 @@
 import os
+import queue
 import time
 import threading
 import logging
-from transformers import pipeline, Conversation
 
 from modules.talk import TalkModule
 from modules.system_commands.commands import ScriptModule
 from modules.chatbot import ChatBotModule
 from modules.cv import detect_and_recognize_face  # Import the face recognition function
 
+class SpeculativeReply:
+    """A chat reply streamed on a background thread while the command is matched.
+
+    Iterating yields the reply chunks. discard() cancels generation, waits for it
+    to stop and rolls the chatbot back to its state before the reply, so a reply
+    that lost to a command leaves no turn behind. The reply is cached only by
+    commit(), once it has been used.
+    """
+
+    def __init__(self, chatbot_module, prompt):
+        self.chatbot_module = chatbot_module
+        self.prompt = prompt
+        self.cancel_event = threading.Event()
+        self.failed = False
+        self._checkpoint = chatbot_module.checkpoint()
+        self._chunks = queue.Queue()
+        self._thread = threading.Thread(target=self._produce, name="speculative-chat", daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        try:
+            for chunk in self.chatbot_module.get_response_stream(self.prompt, self.cancel_event, cache_reply=False):
+                self._chunks.put(chunk)
+        except Exception as e:
+            logging.error(f"Error in speculative response: {e}")
+            self.failed = True
+            self._chunks.put("I'm sorry, I couldn't process that request.")
+        finally:
+            self._chunks.put(None)
+
+    def __iter__(self):
+        return iter(self._chunks.get, None)
+
+    @property
+    def discarded(self):
+        return self.cancel_event.is_set()
+
+    def discard(self):
+        self.cancel_event.set()
+        self._thread.join()
+        self.chatbot_module.rollback(self._checkpoint)
+
+    def commit(self, response):
+        if not self.failed and not self.discarded:
+            self.chatbot_module.cache_response(self.prompt, response)
+
 class JARVIS:
-    def __init__(self):
+    def __init__(self, speculative=False):
         self.talk_module = TalkModule()
         self.script_module = ScriptModule()
         self.chatbot_module = ChatBotModule(model_type="diablo")
         self.wake_word = "hey jarvis"
+        # With speculative=True the chat reply starts while the command is still being
+        # matched. That lowers chat latency, but every command also pays for a reply
+        # that is generated and thrown away, so it is opt-in.
+        self.speculative = speculative
         self.running = True
 
         logging.basicConfig(
@@ -56,16 +106,36 @@ class JARVIS:
             except Exception as e:
                 logging.error(f"Error in listen_for_wake_word: {e}")
 
-    def execute_command(self, command):
-        """Try to execute a system command, return True if successful."""
+    def execute_command(self, command, on_match=None):
+        """Try to execute a system command, return True if the command was handled.
+
+        on_match is called once a command has matched, before it runs. Protected
+        commands are confirmed first; a declined command still counts as handled.
+        """
         try:
-            command_function = self.script_module.get_command(command)
-            command_function()
+            match = self.script_module.match(command)
+            if match is None:
+                logging.info(f"No confident command match for '{command}', deferring to chatbot.")
+                return False
+            logging.debug(f"Matched '{command}' to '{match.command}' ({match.tier}, {match.confidence:.2f})")
+            if on_match is not None:
+                on_match()
+            if self.script_module.requires_confirmation(match) and not self.confirm(match.command):
+                self.speak("Okay, I won't.")
+                return True
+            self.script_module.run(match)
+            self.speak("Command executed successfully.")
             return True
         except Exception as e:
             logging.error(f"Command not recognized or failed to execute: {e}")
             return False
 
+    def confirm(self, action):
+        """Ask the user to confirm an action out loud; return True only on a clear yes."""
+        self.speak(f"Do you want me to {action}? Please say yes or no.")
+        reply = self.recognize_speech().lower().split()
+        return any(word in ("yes", "yeah", "confirm") for word in reply)
+
     def get_response(self, prompt):
         """Get a response from the chatbot module."""
         try:
@@ -74,18 +144,45 @@ class JARVIS:
             logging.error(f"Error in get_response: {e}")
             return "I'm sorry, I couldn't process that request."
 
+    def get_response_stream(self, prompt, cancel_event=None):
+        """Stream a response from the chatbot module, falling back to an apology on error."""
+        try:
+            yield from self.chatbot_module.get_response_stream(prompt, cancel_event=cancel_event)
+        except Exception as e:
+            logging.error(f"Error in get_response_stream: {e}")
+            yield "I'm sorry, I couldn't process that request."
+
+    def start_speculative_response(self, prompt):
+        """Start streaming a chat reply on a background thread and return its SpeculativeReply."""
+        return SpeculativeReply(self.chatbot_module, prompt)
+
+    def speak_stream(self, chunks):
+        """Speak streamed text one sentence at a time and return the full text."""
+        try:
+            return self.talk_module.speak_stream(chunks)
+        except Exception as e:
+            logging.error(f"Error in speak_stream: {e}")
+            return ""
+
     def main_loop(self):
         """Listen for commands and handle them appropriately."""
         while self.running:
             try:
                 command = self.recognize_speech()
                 if command:
-                    if self.execute_command(command):
-                        self.speak("Command executed successfully.")
-                    else:
-                        response_text = self.get_response(command)
+                    reply = self.start_speculative_response(command) if self.speculative else None
+                    if not self.execute_command(command, on_match=reply.discard if reply else None):
+                        if reply is None or reply.discarded:
+                            # No speculation, or it was discarded for a command that then failed.
+                            reply = None
+                            chunks = self.get_response_stream(command)
+                        else:
+                            chunks = reply
+                        # Speech starts with the first complete sentence instead of the full reply.
+                        response_text = self.speak_stream(chunks)
+                        if reply is not None:
+                            reply.commit(response_text)
                         print(f"Chatbot Response: {response_text}")
-                        self.speak(response_text)
                         if "shut down" in response_text.lower():
                             logging.info("Shutting down JARVIS.")
                             self.speak("Goodbye.")
@@ -0,0 +1,285 @@
+import inspect
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class CircuitBreaker:
+    """Takes a backend out of rotation after consecutive failures.
+
+    After failure_threshold failures in a row the breaker opens for cooldown
+    seconds. It then lets a single trial request through (half-open); success
+    closes it again and failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Returns True if a request may be sent, reserving the half-open trial slot."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """Frees the half-open trial slot of a request that ended without an outcome."""
+        self.trial_in_flight = False
+
+    def record(self, success):
+        self.trial_in_flight = False
+        if success:
+            self.failures = 0
+            self.opened_at = None
+        else:
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class BackendStats:
+    """EWMA latency and error rate of one backend, plus a window of recent latencies."""
+
+    def __init__(self, alpha=0.2, window=50):
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.recent = deque(maxlen=window)
+        self.requests = 0
+
+    def record(self, latency, success):
+        self.requests += 1
+        self.error_rate += self.alpha * ((0.0 if success else 1.0) - self.error_rate)
+        if success:
+            self.recent.append(latency)
+            self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+
+    def quantile(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class ChatRouter:
+    """Routes prompts across several chat backends by observed latency and health.
+
+    Each prompt goes to the healthy backend with the lowest expected cost: its
+    EWMA latency plus its EWMA error rate times failure_cost seconds. Backends
+    without samples go first so they get measured.
+    With hedge=True, if the primary has not answered by its hedge_quantile latency
+    (at least min_hedge_delay), the same prompt goes to the next backend. The
+    first successful answer wins and the loser is cancelled: through the
+    cancel_event argument of its get_response if it takes one, otherwise a call
+    that has already started runs to completion in the background. Backends that
+    keep conversation state (those with checkpoint()) are never raced, since a
+    losing call would still add its turn. Failed backends are retried on the next
+    candidate, and a CircuitBreaker per backend keeps repeatedly failing ones out
+    of rotation.
+    """
+
+    def __init__(self, backends, hedge=True, hedge_quantile=0.95, min_hedge_delay=0.2, default_hedge_delay=2.0,
+                 failure_cost=1.0, alpha=0.2, failure_threshold=3, cooldown=30.0, max_workers=8):
+        self.backends = dict(backends)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.failure_cost = failure_cost
+        self.stats = {name: BackendStats(alpha=alpha) for name in self.backends}
+        self.breakers = {name: CircuitBreaker(failure_threshold, cooldown) for name in self.backends}
+        self.stateful = {name for name, backend in self.backends.items() if hasattr(backend, "checkpoint")}
+        self.cancellable = {name for name, backend in self.backends.items() if _accepts_cancel_event(backend)}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-router")
+
+    def get_response(self, prompt: str) -> str:
+        candidates = self._ranked_backends()
+        pending = {}
+        last_error = None
+        if not self._launch_next(candidates, prompt, pending):
+            raise RuntimeError("No healthy chat backend available")
+        while pending:
+            hedging = self.hedge and not self.stateful.intersection(name for name, _ in pending.values()) \
+                and any(name not in self.stateful for name in candidates)
+            timeout = self._hedge_delay(next(iter(pending.values()))[0]) if hedging else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The primary is slower than its usual tail latency: hedge on the next backend.
+                self._launch_next(candidates, prompt, pending, hedge=True)
+                continue
+            for future in done:
+                pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for loser, (_, cancel_event) in pending.items():
+                    loser.cancel()
+                    if cancel_event is not None:
+                        cancel_event.set()
+                return response
+            if not pending:
+                self._launch_next(candidates, prompt, pending)
+        raise last_error or RuntimeError("All chat backends failed")
+
+    def get_response_stream(self, prompt: str, cancel_event=None):
+        """Streams from the best healthy backend, failing over if it errors before the first chunk."""
+        kwargs = {"cancel_event": cancel_event} if cancel_event is not None else {}
+        last_error = None
+        for name in self._ranked_backends():
+            if not self._allow(name):
+                continue
+            backend = self.backends[name]
+            start = time.monotonic()
+            started = False
+            try:
+                stream = backend.get_response_stream(prompt, **kwargs) if hasattr(backend, "get_response_stream") \
+                    else iter([backend.get_response(prompt)])
+                for chunk in stream:
+                    if not started:
+                        self._record(name, time.monotonic() - start, True)
+                        started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    raise
+                self._record(name, time.monotonic() - start, False)
+                last_error = e
+            finally:
+                if not started:
+                    # Covers an empty stream and a consumer that closed the stream before the first chunk.
+                    self._release(name)
+        raise last_error or RuntimeError("No healthy chat backend available")
+
+    def checkpoint(self):
+        """Captures the conversation state of every backend that keeps one."""
+        return {name: backend.checkpoint() for name, backend in self.backends.items() if hasattr(backend, "checkpoint")}
+
+    def rollback(self, checkpoint):
+        for name, state in checkpoint.items():
+            self.backends[name].rollback(state)
+
+    def backend_stats(self):
+        """Returns latency, error rate and breaker state per backend."""
+        with self._lock:
+            return {
+                name: {
+                    "ewma_latency": stats.latency,
+                    "error_rate": stats.error_rate,
+                    "p95_latency": stats.quantile(0.95),
+                    "requests": stats.requests,
+                    "breaker": self.breakers[name].state,
+                }
+                for name, stats in self.stats.items()
+            }
+
+    def _ranked_backends(self):
+        with self._lock:
+            scored = []
+            for name, stats in self.stats.items():
+                if self.breakers[name].state == "open":
+                    continue
+                latency = stats.latency if stats.latency is not None else 0.0
+                scored.append((latency + self.failure_cost * stats.error_rate, name))
+        return [name for _, name in sorted(scored)]
+
+    def _hedge_delay(self, name):
+        with self._lock:
+            observed = self.stats[name].quantile(self.hedge_quantile)
+        return max(observed if observed is not None else self.default_hedge_delay, self.min_hedge_delay)
+
+    def _allow(self, name):
+        with self._lock:
+            return self.breakers[name].allow()
+
+    def _launch_next(self, candidates, prompt, pending, hedge=False):
+        """Submits the prompt to the next candidate its breaker lets through; returns False if none.
+
+        A hedge skips stateful candidates, leaving them for failover.
+        """
+        for name in list(candidates):
+            if hedge and name in self.stateful:
+                continue
+            candidates.remove(name)
+            if not self._allow(name):
+                continue
+            cancel_event = threading.Event() if name in self.cancellable else None
+            kwargs = {"cancel_event": cancel_event} if cancel_event is not None else {}
+            start = time.monotonic()
+            future = self._executor.submit(self.backends[name].get_response, prompt, **kwargs)
+            future.add_done_callback(
+                lambda f, name=name, start=start, cancel_event=cancel_event: self._on_done(name, start, f, cancel_event)
+            )
+            pending[future] = (name, cancel_event)
+            return True
+        return False
+
+    def _on_done(self, name, start, future, cancel_event=None):
+        # A hedge cancelled before it finished says nothing about the backend, but may hold its trial slot.
+        if future.cancelled() or (cancel_event is not None and cancel_event.is_set()):
+            self._release(name)
+        else:
+            self._record(name, time.monotonic() - start, future.exception() is None)
+
+    def _release(self, name):
+        with self._lock:
+            self.breakers[name].release()
+
+    def _record(self, name, latency, success):
+        with self._lock:
+            self.stats[name].record(latency, success)
+            self.breakers[name].record(success)
+
+
+def _accepts_cancel_event(backend):
+    try:
+        return "cancel_event" in inspect.signature(backend.get_response).parameters
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+
+class StandInChat:
+    """Offline backend with configurable latency and failure rate, for exercising the router."""
+
+    def __init__(self, name="stand-in", latency=0.05, jitter=0.0, failure_rate=0.0, seed=None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    def get_response(self, prompt: str, cancel_event=None) -> str:
+        delay = max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0)
+        if cancel_event is None:
+            time.sleep(delay)
+        elif cancel_event.wait(delay):
+            raise RuntimeError(f"{self.name} cancelled")
+        if self._random.random() < self.failure_rate:
+            raise RuntimeError(f"{self.name} failed")
+        return f"[{self.name}] {prompt}"
+
+    def get_response_stream(self, prompt: str, cancel_event=None):
+        for word in self.get_response(prompt).split(" "):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield word + " "
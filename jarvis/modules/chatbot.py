@@ -1,11 +1,29 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import aiohttp
 import openai
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+import torch
+from transformers import (AutoModelForCausalLM, AutoTokenizer, StoppingCriteria, StoppingCriteriaList,
+                          TextIteratorStreamer)
+from transformers.pytorch_utils import Conv1D
 import vertexai
 from vertexai.generative_models import GenerativeModel, Image, Part
 
+from .chat_router import ChatRouter
+from .system_commands.encoders import load_encoder
+
 
 class ChatBotModule:
-    def __init__(self, model_type: str, **kwargs):
+    # Backends whose replies depend on earlier turns. A cached reply would skip the
+    # turn, so their history drifts from what the user heard; they are never cached.
+    STATEFUL_MODEL_TYPES = frozenset(["diablo", "router"])
+
+    def __init__(self, model_type: str, response_cache=None, **kwargs):
         self.model_type = model_type.lower()
         if self.model_type == "openai":
             self.chatbot = OpenAIChat(**kwargs)
@@ -13,11 +31,82 @@ class ChatBotModule:
             self.chatbot = DiabloChat(**kwargs)
         elif self.model_type == "gemini":
             self.chatbot = GeminiChat(**kwargs)
+        elif self.model_type == "router":
+            # kwargs["backends"] maps names to chat backends, e.g. {"diablo": DiabloChat(), "gemini": GeminiChat(...)}.
+            self.chatbot = ChatRouter(**kwargs)
         else:
             raise ValueError(f"Unsupported model type: {self.model_type}")
 
+        # Caching is opt-in: pass a response_cache.ResponseCache, e.g. with embed=default_prompt_embedder()
+        # to also serve near-duplicate prompts.
+        if response_cache and self.model_type in self.STATEFUL_MODEL_TYPES:
+            raise ValueError(f"Response caching is not supported for the stateful {self.model_type} backend")
+        self.response_cache = response_cache or None
+
     def get_response(self, prompt: str):
-        return self.chatbot.get_response(prompt)
+        cached = self.response_cache.get(self.model_type, prompt) if self.response_cache else None
+        if cached is not None:
+            return cached
+        response = self.chatbot.get_response(prompt)
+        self.cache_response(prompt, response)
+        return response
+
+    def get_response_stream(self, prompt: str, cancel_event=None, cache_reply=True):
+        """Yields the response in text chunks as the backend produces them.
+
+        Setting cancel_event stops generation early; a cancelled reply is not cached.
+        With cache_reply=False the reply is not stored either, e.g. for a speculative
+        reply that may go unused; call cache_response once it is used.
+        """
+        cached = self.response_cache.get(self.model_type, prompt) if self.response_cache else None
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        for chunk in self.chatbot.get_response_stream(prompt, cancel_event=cancel_event):
+            chunks.append(chunk)
+            yield chunk
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if cache_reply:
+            self.cache_response(prompt, "".join(chunks).strip())
+
+    def cache_response(self, prompt: str, response: str):
+        if self.response_cache and response:
+            self.response_cache.put(self.model_type, prompt, response)
+
+    def checkpoint(self):
+        """Returns the backend's conversation state for rollback(), or None if it keeps none."""
+        checkpoint = getattr(self.chatbot, "checkpoint", None)
+        return checkpoint() if checkpoint is not None else None
+
+    def rollback(self, checkpoint):
+        """Undoes the turns taken since checkpoint() was called."""
+        if checkpoint is not None:
+            self.chatbot.rollback(checkpoint)
+
+
+class GenerationCancelled(Exception):
+    """Raised when a generation is stopped through its cancel event."""
+
+
+def iter_until_cancelled(stream, cancel_event):
+    """Yields from a response stream until cancel_event is set, then closes it to abort the request."""
+    try:
+        for chunk in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            yield chunk
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+
+def default_prompt_embedder():
+    """Returns an embed function backed by the quantized MiniLM encoder, loaded on first use."""
+    encoder = load_encoder("minilm")
+    return encoder.encode
 
 
 class OpenAIChat:
@@ -32,51 +121,507 @@ class OpenAIChat:
         )
         return response.choices[0].text.strip()
 
+    def get_response_stream(self, prompt: str, cancel_event=None):
+        response = openai.Completion.create(
+            engine="davinci",
+            prompt=prompt,
+            max_tokens=150,
+            stream=True
+        )
+        for chunk in iter_until_cancelled(response, cancel_event):
+            text = chunk.choices[0].text
+            if text:
+                yield text
 
-class DiabloChat:
-    def __init__(self) -> None:
-        model_name = "microsoft/DialoGPT-medium"
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(model_name)
-        self.conversation_history = []
-        self.chatbot = pipeline('conversational', model='microsoft/DialoGPT-medium')
 
-    def get_response(self, prompt: str) -> str:
-        conversation = self.chatbot(prompt)
-        self.conversation_history.append(conversation)
-        inputs = self.tokenizer(prompt, return_tensors="pt")
-        outputs = self.model.generate(**inputs, max_length=150)
-        response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+class ConversationSessions:
+    """Per-conversation state kept for up to max_sessions conversations, least recently used first out."""
+
+    def __init__(self, factory, max_sessions=256):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    def get(self, conversation_id):
+        session = self._sessions.get(conversation_id)
+        if session is None:
+            session = self._sessions[conversation_id] = self.factory()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(conversation_id)
+        return session
+
+    def end(self, conversation_id):
+        self._sessions.pop(conversation_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class AsyncOpenAIChat:
+    """Async OpenAI completions with per-conversation history and a capped number of in-flight requests.
+
+    Every request goes through one aiohttp session, so connections to the API are
+    kept alive and reused. The completions endpoint is stateless, so each
+    conversation keeps its last max_turns exchanges and sends them as context.
+    """
+
+    def __init__(self, api_key: str, max_in_flight=8, max_turns=6, max_sessions=256) -> None:
+        openai.api_key = api_key
+        self.max_in_flight = max_in_flight
+        self.sessions = ConversationSessions(lambda: {"turns": deque(maxlen=max_turns), "lock": asyncio.Lock()},
+                                             max_sessions)
+        self._semaphore = None
+        self._http = None
+
+    async def get_response(self, prompt: str, conversation_id=None) -> str:
+        if conversation_id is None:
+            return await self._complete(prompt)
+        session = self.sessions.get(conversation_id)
+        # Turns of one conversation are answered in order; different conversations run concurrently.
+        async with session["lock"]:
+            context = "".join(f"User: {user}\nAssistant: {bot}\n" for user, bot in session["turns"])
+            response = await self._complete(f"{context}User: {prompt}\nAssistant:")
+            session["turns"].append((prompt, response))
         return response
-    
+
+    def end_conversation(self, conversation_id):
+        self.sessions.end(conversation_id)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def _complete(self, prompt):
+        if self._semaphore is None:
+            # Created lazily so the semaphore and HTTP session bind to the running loop.
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._http = aiohttp.ClientSession()
+        openai.aiosession.set(self._http)
+        async with self._semaphore:
+            response = await openai.Completion.acreate(engine="davinci", prompt=prompt, max_tokens=150)
+        return response.choices[0].text.strip()
+
+
+_shared_models = {}
+_shared_models_lock = threading.Lock()
+
+# Generation settings per deployment profile. "cpu" trades a little quality for
+# int8 linear layers and replies that stop at the first sentence end.
+GENERATION_PROFILES = {
+    "default": {"quantize": False, "stop_at_sentence_end": False},
+    "cpu": {"quantize": True, "stop_at_sentence_end": True},
+}
+
+
+def configure_torch_threads(num_threads=None, num_interop_threads=None):
+    """Sets torch's intra-op and inter-op thread counts where given."""
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            # Inter-op threads can only be set before the first parallel op runs.
+            pass
+
+
+def _conv1d_to_linear(module):
+    """Replaces GPT-2 style Conv1D layers with equivalent nn.Linear so they can be quantized."""
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+
+
+def load_causal_lm(model_name: str, quantize: bool = False):
+    """Returns the process-wide (tokenizer, model) pair for model_name, loading it once.
+
+    With quantize=True the linear layers are converted to dynamic int8.
+    """
+    key = (model_name, quantize)
+    with _shared_models_lock:
+        if key not in _shared_models:
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModelForCausalLM.from_pretrained(model_name)
+            model.eval()
+            if quantize:
+                _conv1d_to_linear(model)
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            _shared_models[key] = (tokenizer, model)
+        return _shared_models[key]
+
+
+class SentenceEndCriteria(StoppingCriteria):
+    """Stops generation once a row's latest token ends a sentence."""
+
+    def __init__(self, tokenizer, prompt_length: int, min_new_tokens: int = 4) -> None:
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.min_new_tokens = min_new_tokens
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if input_ids.shape[-1] - self.prompt_length < self.min_new_tokens:
+            return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        last_tokens = self.tokenizer.batch_decode(input_ids[:, -1:])
+        done = [token.rstrip().endswith((".", "!", "?")) for token in last_tokens]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+class CancelCriteria(StoppingCriteria):
+    """Stops generation at the next token once cancel_event is set."""
+
+    def __init__(self, cancel_event) -> None:
+        self.cancel_event = cancel_event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.cancel_event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+class GenerationScheduler:
+    """Micro-batches concurrent generate requests for one causal LM.
+
+    Requests are queued and a worker thread waits up to max_wait_ms after the
+    first one to gather at most max_batch of them. They are left-padded into a
+    single generate call, and each caller's Future receives its own reply token
+    ids, cut at the first EOS.
+    """
+
+    def __init__(self, model_name: str, max_batch: int = 8, max_wait_ms: float = 5.0, quantize: bool = False) -> None:
+        self.model_name = model_name
+        self.quantize = quantize
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, input_ids, max_new_tokens: int) -> Future:
+        """Queues a token id list for generation; the Future resolves to the reply ids."""
+        future = Future()
+        self._queue.put((list(input_ids), max_new_tokens, future))
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="generation-scheduler", daemon=True)
+                self._thread.start()
+        return future
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            batch = [request for request in batch if request[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # Never let one bad batch stop the worker, or every later submit would hang.
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run_batch(self, batch):
+        """Generates one batch; any failure, including loading the model, goes to every caller's Future."""
+        try:
+            tokenizer, model = load_causal_lm(self.model_name, self.quantize)
+            pad = tokenizer.eos_token_id
+            width = max(len(ids) for ids, _, _ in batch)
+            input_ids = torch.tensor([[pad] * (width - len(ids)) + ids for ids, _, _ in batch])
+            attention_mask = torch.tensor([[0] * (width - len(ids)) + [1] * len(ids) for ids, _, _ in batch])
+            with torch.inference_mode():
+                output = model.generate(
+                    input_ids,
+                    attention_mask=attention_mask,
+                    max_new_tokens=max(max_new for _, max_new, _ in batch),
+                    pad_token_id=pad,
+                )
+            rows = output[:, width:].tolist()
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for row, (_, max_new, future) in zip(rows, batch):
+            reply = row[:max_new]
+            if pad in reply:
+                reply = reply[:reply.index(pad) + 1]
+            future.set_result(reply)
+
+
+_shared_schedulers = {}
+
+
+def get_generation_scheduler(model_name: str, quantize: bool = False, **kwargs) -> GenerationScheduler:
+    """Returns the process-wide GenerationScheduler for model_name."""
+    key = (model_name, quantize)
+    with _shared_models_lock:
+        if key not in _shared_schedulers:
+            _shared_schedulers[key] = GenerationScheduler(model_name, quantize=quantize, **kwargs)
+        return _shared_schedulers[key]
+
+
+class DiabloChat:
+    """DialoGPT chat session that carries context across turns within a token budget.
+
+    The key/value cache from the previous turn is kept, so each turn only encodes
+    the new user tokens. Once context plus the reply would exceed
+    max_context_tokens, the oldest turns are evicted. That invalidates the cache,
+    so eviction frees a quarter of the budget at a time and the window is
+    re-encoded only every few turns.
+
+    With batching=True, turns go through the process-wide GenerationScheduler and
+    are batched with other sessions. Batched turns re-encode their context window
+    instead of reusing the cache, trading per-turn work for throughput under
+    concurrent load.
+
+    profile selects an entry of GENERATION_PROFILES; "cpu" loads an int8 model and
+    stops replies at the first sentence end. num_threads and num_interop_threads
+    tune torch's CPU thread pools.
+    """
+
+    def __init__(self, model_name: str = "microsoft/DialoGPT-medium", max_context_tokens: int = 512,
+                 max_new_tokens: int = 64, batching: bool = False, profile: str = "default",
+                 num_threads: int = None, num_interop_threads: int = None) -> None:
+        if profile not in GENERATION_PROFILES:
+            raise ValueError(f"Unsupported generation profile: {profile}")
+        configure_torch_threads(num_threads, num_interop_threads)
+        self.model_name = model_name
+        self.profile = profile
+        self.quantize = GENERATION_PROFILES[profile]["quantize"]
+        self.stop_at_sentence_end = GENERATION_PROFILES[profile]["stop_at_sentence_end"]
+        self.scheduler = get_generation_scheduler(model_name, quantize=self.quantize) if batching else None
+        self.max_context_tokens = max_context_tokens
+        self.max_new_tokens = max_new_tokens
+        self.conversation_history = deque()
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def tokenizer(self):
+        return load_causal_lm(self.model_name, self.quantize)[0]
+
+    @property
+    def model(self):
+        return load_causal_lm(self.model_name, self.quantize)[1]
+
+    def reset(self) -> None:
+        """Forgets the conversation and its cached state."""
+        self.conversation_history.clear()
+        self._context_ids = []
+        self._turn_lengths = deque()
+        self._past_key_values = None
+
+    def get_response(self, prompt: str, cancel_event=None) -> str:
+        """Returns the reply; setting cancel_event raises GenerationCancelled and drops the turn."""
+        return self._generate(prompt, cancel_event=cancel_event)
+
+    def checkpoint(self):
+        """Captures the conversation so the turns after it can be undone with rollback()."""
+        with self._lock:
+            return tuple(self.conversation_history), self._context_ids, tuple(self._turn_lengths)
+
+    def rollback(self, checkpoint) -> None:
+        """Restores the conversation captured by checkpoint()."""
+        history, context_ids, turn_lengths = checkpoint
+        with self._lock:
+            self.conversation_history.clear()
+            self.conversation_history.extend(history)
+            self._context_ids = context_ids
+            self._turn_lengths = deque(turn_lengths)
+            # generate may have extended the cache in place; re-encode the context next turn.
+            self._past_key_values = None
+
+    def get_response_stream(self, prompt: str, cancel_event=None):
+        """Yields decoded text as tokens are generated on a background thread.
+
+        Setting cancel_event stops generation at the next token and ends the
+        stream; the cancelled turn is not added to the conversation.
+        """
+        if self.scheduler is not None:
+            # Batched generation returns whole replies.
+            try:
+                yield self._generate(prompt, cancel_event=cancel_event)
+            except GenerationCancelled:
+                pass
+            return
+        tokenizer = self.tokenizer
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        errors = []
+
+        def run():
+            try:
+                self._generate(prompt, streamer=streamer, cancel_event=cancel_event)
+            except GenerationCancelled:
+                pass
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        for text in streamer:
+            if text:
+                yield text
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    def _generate(self, prompt: str, streamer=None, cancel_event=None) -> str:
+        tokenizer, model = load_causal_lm(self.model_name, self.quantize)
+        eos = tokenizer.eos_token_id
+        with self._lock:
+            prompt_budget = max(self.max_context_tokens - self.max_new_tokens, 1)
+            new_ids = tokenizer.encode(prompt + tokenizer.eos_token)[-prompt_budget:]
+            self._fit_budget(len(new_ids))
+
+            input_ids = self._context_ids + new_ids
+            if self.scheduler is not None:
+                reply_ids = self._wait_for_batch(self.scheduler.submit(input_ids, self.max_new_tokens), cancel_event)
+                sequence = input_ids + reply_ids
+                past_key_values = None
+            else:
+                stopping_criteria = StoppingCriteriaList()
+                if self.stop_at_sentence_end:
+                    stopping_criteria.append(SentenceEndCriteria(tokenizer, len(input_ids)))
+                if cancel_event is not None:
+                    stopping_criteria.append(CancelCriteria(cancel_event))
+                with torch.inference_mode():
+                    output = model.generate(
+                        torch.tensor([input_ids]),
+                        past_key_values=self._past_key_values,
+                        max_new_tokens=self.max_new_tokens,
+                        pad_token_id=eos,
+                        use_cache=True,
+                        return_dict_in_generate=True,
+                        streamer=streamer,
+                        stopping_criteria=stopping_criteria,
+                    )
+                if cancel_event is not None and cancel_event.is_set():
+                    # generate may have extended the cache in place; re-encode the context next turn.
+                    self._past_key_values = None
+                    raise GenerationCancelled()
+                sequence = output.sequences[0].tolist()
+                reply_ids = sequence[len(input_ids):]
+                past_key_values = output.past_key_values
+            if not reply_ids or reply_ids[-1] != eos:
+                # DialoGPT separates turns with EOS; it is encoded with the next turn.
+                sequence.append(eos)
+
+            self._past_key_values = past_key_values
+            self._turn_lengths.append(len(sequence) - len(self._context_ids))
+            self._context_ids = sequence
+            response = tokenizer.decode(reply_ids, skip_special_tokens=True)
+            self.conversation_history.append((prompt, response))
+            return response
+
+    @staticmethod
+    def _wait_for_batch(future, cancel_event, poll_interval=0.01):
+        """Waits for a scheduled generation, withdrawing it if cancel_event is set first."""
+        if cancel_event is None:
+            return future.result()
+        while not cancel_event.is_set():
+            try:
+                return future.result(timeout=poll_interval)
+            except FutureTimeoutError:
+                continue
+        # Only a request still queued can be withdrawn; a running batch finishes and is discarded.
+        future.cancel()
+        raise GenerationCancelled()
+
+    def _fit_budget(self, new_tokens: int) -> None:
+        """Evicts the oldest turns when the next turn would not fit in max_context_tokens."""
+        needed = len(self._context_ids) + new_tokens + self.max_new_tokens
+        if needed <= self.max_context_tokens:
+            return
+        target = self.max_context_tokens * 3 // 4
+        evicted = 0
+        while self._turn_lengths and needed - evicted > target:
+            evicted += self._turn_lengths.popleft()
+            self.conversation_history.popleft()
+        self._context_ids = self._context_ids[evicted:]
+        self._past_key_values = None
+
     def response(self, prompt):
         """Generates a response using DialoGPT for conversational responses."""
-        conversation = Conversation(prompt)
-        self.conversation_history.append(conversation)
-        response = self.chatbot(self.conversation_history)
-        return response[-1]["content"]
+        return self.get_response(prompt)
 
 class GeminiChat:
-    def __init__(self, project_id: str, region: str) -> None:
+    def __init__(self, project_id: str, region: str, max_sessions=256) -> None:
         vertexai.init(project=project_id, location=region)
         self.model = GenerativeModel('gemini-1.5-flash')
+        self.sessions = ConversationSessions(self.model.start_chat, max_sessions)
 
     def get_response(self, prompt: str) -> str:
         response = self.model.generate_content(prompt)
         return response.text
 
+    def get_response_stream(self, prompt: str, cancel_event=None):
+        for chunk in iter_until_cancelled(self.model.generate_content(prompt, stream=True), cancel_event):
+            text = chunk.text
+            if text:
+                yield text
+
     def text_from_image(self, path: str, prompt: str) -> str:
         image = Image.load_from_file(path)
         response = self.model.generate_content([prompt, image])
         return response.text
 
-    def text_from_chat(self, chat: str) -> str:
-        chat_session = self.model.start_chat()
-        response = chat_session.send_message(chat)
+    def text_from_chat(self, chat: str, conversation_id="default") -> str:
+        """Sends a message within a conversation, keeping its chat session between calls."""
+        response = self.sessions.get(conversation_id).send_message(chat)
         return response.text
 
+    def end_conversation(self, conversation_id):
+        self.sessions.end(conversation_id)
+
     def text_from_video(self, path: str, prompt: str) -> str:
         video_file = Part.from_uri(path, mime_type="video/mp4")
         contents = [video_file, prompt]
         response = self.model.generate_content(contents)
         return response.text
+
+
+class AsyncGeminiChat:
+    """Async Gemini client with chat sessions keyed by conversation ID.
+
+    One GenerativeModel is shared by every conversation, so its underlying
+    client channel is reused. At most max_in_flight requests are sent at once,
+    and the turns of one conversation are answered in order.
+    """
+
+    def __init__(self, project_id: str, region: str, max_in_flight=8, max_sessions=256) -> None:
+        vertexai.init(project=project_id, location=region)
+        self.model = GenerativeModel('gemini-1.5-flash')
+        self.max_in_flight = max_in_flight
+        self.sessions = ConversationSessions(lambda: (self.model.start_chat(), asyncio.Lock()), max_sessions)
+        self._semaphore = None
+
+    async def get_response(self, prompt: str, conversation_id=None) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        if conversation_id is None:
+            async with self._semaphore:
+                response = await self.model.generate_content_async(prompt)
+            return response.text
+        chat_session, lock = self.sessions.get(conversation_id)
+        async with lock, self._semaphore:
+            response = await chat_session.send_message_async(prompt)
+        return response.text
+
+    def end_conversation(self, conversation_id):
+        self.sessions.end(conversation_id)
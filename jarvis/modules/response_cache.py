@@ -0,0 +1,169 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_prompt(prompt):
+    """Lowercases a prompt and strips punctuation and extra whitespace."""
+    return " ".join(re.findall(r"[a-z0-9']+", prompt.lower()))
+
+
+class ResponseCache:
+    """Cache of chatbot responses with an exact tier and a near-duplicate tier.
+
+    Exact lookups are keyed by (namespace, normalized prompt), with one namespace
+    per backend, and cost a dictionary lookup. On an exact miss, if an embed
+    function is given, the prompt is embedded and compared with the cached prompts
+    of the same namespace. A cosine similarity of at least similarity_threshold
+    counts as a hit. Entries expire after ttl seconds, and the least recently used
+    entry is evicted beyond max_entries. With db_path, entries are also written to
+    SQLite and reloaded on start.
+    """
+
+    def __init__(self, max_entries=512, ttl=24 * 3600, similarity_threshold=0.92, embed=None, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._last_embedding = None
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    def get(self, namespace, prompt):
+        """Returns a cached response for the prompt, or None on a miss."""
+        key = (namespace, normalize_prompt(prompt))
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["response"]
+
+        if self.embed is not None:
+            embedding = self._embed(key[1])
+            with self._lock:
+                match = self._nearest(namespace, embedding)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    return self._entries[match]["response"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, namespace, prompt, response):
+        """Stores a response, evicting the least recently used entry when full."""
+        key = (namespace, normalize_prompt(prompt))
+        embedding = self._embed(key[1]) if self.embed is not None else None
+        entry = {"response": response, "created": time.time(), "embedding": embedding}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._write(key, entry)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._delete(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and the current entry count."""
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+    def _embed(self, text):
+        # A miss is usually followed by a put of the same prompt; reuse that embedding.
+        last = self._last_embedding
+        if last is not None and last[0] == text:
+            return last[1]
+        vector = np.asarray(self.embed([text]), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+        self._last_embedding = (text, vector)
+        return vector
+
+    def _expired(self, entry):
+        return self.ttl is not None and time.time() - entry["created"] > self.ttl
+
+    def _live_entry(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry):
+            del self._entries[key]
+            self._delete(key)
+            return None
+        return entry
+
+    def _nearest(self, namespace, embedding):
+        best_key, best_score = None, self.similarity_threshold
+        for key in list(self._entries):
+            if key[0] != namespace:
+                continue
+            entry = self._live_entry(key)
+            if entry is None or entry["embedding"] is None:
+                continue
+            score = float(np.dot(entry["embedding"], embedding))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _open_db(self, db_path):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "namespace TEXT, prompt TEXT, response TEXT, created REAL, embedding BLOB, "
+            "PRIMARY KEY (namespace, prompt))"
+        )
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        # Only the newest max_entries are loaded; drop the rest so the table stays bounded.
+        self._db.execute(
+            "DELETE FROM responses WHERE rowid NOT IN (SELECT rowid FROM responses ORDER BY created DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT namespace, prompt, response, created, embedding FROM responses ORDER BY created"
+        ).fetchall()
+        for namespace, prompt, response, created, blob in rows:
+            embedding = np.frombuffer(blob, dtype=np.float32) if blob else None
+            self._entries[(namespace, prompt)] = {"response": response, "created": created, "embedding": embedding}
+
+    def _write(self, key, entry):
+        if self._db is None:
+            return
+        blob = entry["embedding"].tobytes() if entry["embedding"] is not None else None
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key[0], key[1], entry["response"], entry["created"], blob),
+        )
+        self._db.commit()
+
+    def _delete(self, key):
+        if self._db is None:
+            return
+        self._db.execute("DELETE FROM responses WHERE namespace = ? AND prompt = ?", key)
+        self._db.commit()
@@ -1,20 +1,47 @@
+import functools
+import json
+import os
 import platform
-import torch
 import numpy as np
 
 from .apple_command import AppleScriptModule
 from .windows_command import PowerShellModule 
+from .embedding_cache import DEFAULT_CACHE_DIR, EmbeddingCache
+from .encoders import load_encoder
+from .executor import CommandExecutor
+from .grammar import SlotGrammar
+from .matcher import CommandMatch, LexicalMatcher, camel_to_phrase
 
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+DEFAULT_INTENT_COMMANDS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "intent_commands.json")
+
+# Argument grammar for parameterized commands; commands without a spec take no arguments.
+COMMAND_SPECS = {
+    'open application': 'open [the] application {app_name}',
+    'set volume': 'set [the] volume [to] {volume_level:percent} [percent]',
+    'display dialog': 'display [a] dialog [saying] {message}',
+    'display notification': 'display [a] notification {message} with title {title}',
+    'create folder': 'create [a] folder [named] {folder_name}',
+    'move file': 'move file {source:path} to {destination:path}',
+    'delete file': 'delete file {file_path:path}',
+}
+
+# Commands that are hard to undo. They are matched only by the grammar or an exact
+# utterance, never by the prefix, fuzzy or embedding tiers, and callers should
+# confirm them before running (see ScriptModule.requires_confirmation).
+PROTECTED_COMMANDS = frozenset(['shutdown', 'restart', 'delete file', 'close all finder windows'])
 
 
 class ScriptModule:
-    def __init__(self):
-        self.os_name = platform.system()
+    def __init__(self, encoder="bert", embedding_cache=None, intent_commands_path=DEFAULT_INTENT_COMMANDS_PATH,
+                 rejection_threshold=0.6, fuzzy_threshold=0.8, embedding_temperature=0.05, os_name=None,
+                 intent_timeout=30):
+        self.os_name = os_name or platform.system()
         if self.os_name == "Darwin":
             self.module = AppleScriptModule()
+            self.intent_command_key = "mac_command"
         elif self.os_name == "Windows":
             self.module = PowerShellModule()
+            self.intent_command_key = "windows_command"
         else:
             raise Exception(f"Unsupported operating system: {self.os_name}")
 
@@ -36,41 +63,156 @@ class ScriptModule:
             'get frontmost finder path': self.module.get_frontmost_finder_path,
             'close all finder windows': self.module.close_all_finder_windows,
         }
+        self.intent_commands = self._load_intent_commands(intent_commands_path)
+        # Some intents open windows or dialogs that stay up until the user closes them; never kill those.
+        self.intent_executor = CommandExecutor(intent_commands=self.intent_commands, timeout=intent_timeout,
+                                               system=self.os_name, kill_on_timeout=False)
+        for intent in self.intent_commands:
+            self.command_mapping.setdefault(camel_to_phrase(intent), functools.partial(self.run_intent, intent))
+
+        self.grammar = SlotGrammar(COMMAND_SPECS)
+        self.rejection_threshold = rejection_threshold
+        self.fuzzy_threshold = fuzzy_threshold
+        self.embedding_temperature = embedding_temperature
 
-        self.tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
-        self.model = AutoModelForSequenceClassification.from_pretrained("bert-base-uncased")
-        self.nlp = pipeline('feature-extraction', model=self.model, tokenizer=self.tokenizer)
+        self.encoder = load_encoder(encoder)
+        if embedding_cache is None:
+            cache_dir = os.path.join(DEFAULT_CACHE_DIR, self.encoder.model_name.replace("/", "--"))
+            embedding_cache = EmbeddingCache(self.encoder.model_name, revision=self.encoder.resolve_revision(),
+                                             pooling=self.encoder.pooling, cache_dir=cache_dir)
+        self.embedding_cache = embedding_cache
+
+        self._index_keys = ()
+        self._index_matrix = None
+        self._lexical_matcher = None
+        self._protected_mask = None
+        self._build_command_index()
 
     def get_command(self, spoken_command):
         """Maps a spoken command to the appropriate method."""
-        spoken_embedding = self._embed_text(spoken_command)
-        best_match = None
-        best_similarity = float('-inf')
-        
-        for command in self.command_mapping.keys():
-            command_embedding = self._embed_text(command)
-            similarity = self._cosine_similarity(spoken_embedding, command_embedding)
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match = command
-        
-        if best_match:
-            return self.command_mapping[best_match]
-        else:
+        match = self.match(spoken_command)
+        if match is None:
             raise Exception(f"No suitable command found for '{spoken_command}'")
+        return self.command_mapping[match.command]
+
+    def match(self, spoken_command):
+        """Resolves an utterance through the grammar, exact/prefix, fuzzy and embedding tiers in turn.
+
+        Returns a CommandMatch, with parsed arguments when the slot grammar matched,
+        or None when the best confidence is below the rejection threshold or the
+        grammar rejected a parameterized command's arguments, so the utterance can
+        go to the chatbot instead.
+        """
+        if tuple(self.command_mapping) != self._index_keys:
+            self._build_command_index()
+
+        parsed = self.grammar.parse(spoken_command)
+        if parsed is not None and parsed[0] in self.command_mapping:
+            command, args = parsed
+            return CommandMatch(command, 1.0, "grammar", args)
+
+        match = self._lexical_matcher.match(spoken_command)
+        if match is None and self._index_keys:
+            match = self._match_embedding(spoken_command)
+        if match is None or match.confidence < self.rejection_threshold:
+            return None
+        if match.command in COMMAND_SPECS:
+            # Parameterized commands need their arguments, which only the grammar extracts.
+            return None
+        return match
+
+    def requires_confirmation(self, match):
+        """True if the matched command is protected and should be confirmed before it runs."""
+        return match.command in PROTECTED_COMMANDS
+
+    def run(self, match):
+        """Calls the command behind a CommandMatch with its parsed arguments."""
+        return self.command_mapping[match.command](**(match.args or {}))
+
+    def _match_embedding(self, spoken_command):
+        """Scores an utterance with the embedding model; confidence is a softmax over the catalog."""
+        similarities = self._command_matrix() @ self._normalize(self._embed_text(spoken_command))
+        similarities[self._protected_mask] = -np.inf
+        if not np.isfinite(similarities).any():
+            return None
+        logits = (similarities - similarities.max()) / self.embedding_temperature
+        probabilities = np.exp(logits) / np.exp(logits).sum()
+        best = int(np.argmax(probabilities))
+        return CommandMatch(self._index_keys[best], float(probabilities[best]), "embedding")
+
+    def get_commands(self, spoken_commands, top_k=3):
+        """Ranks the known commands for every utterance with a single batched forward pass.
+
+        Returns one list per utterance of (command, similarity) pairs, best first.
+        """
+        if tuple(self.command_mapping) != self._index_keys:
+            self._build_command_index()
+        if not self._index_keys:
+            raise Exception(f"No suitable command found for {spoken_commands!r}")
+        if not spoken_commands:
+            return []
+
+        spoken_matrix = self._normalize(self._embed_batch(spoken_commands))
+        similarities = spoken_matrix @ self._command_matrix().T
+        top_k = min(top_k, len(self._index_keys))
+        ranked = np.argsort(-similarities, axis=1)[:, :top_k]
+        return [
+            [(self._index_keys[j], float(similarities[i, j])) for j in row]
+            for i, row in enumerate(ranked)
+        ]
+
+    def _build_command_index(self):
+        """Rebuilds the lexical matcher; the embedding matrix is built on first use."""
+        self._index_keys = tuple(self.command_mapping)
+        self._index_matrix = None
+        self._lexical_matcher = LexicalMatcher(self._index_keys, fuzzy_threshold=self.fuzzy_threshold,
+                                               exact_only=PROTECTED_COMMANDS)
+        self._protected_mask = np.array([key in PROTECTED_COMMANDS for key in self._index_keys], dtype=bool)
+
+    def _command_matrix(self):
+        """Returns the row-normalized embeddings of every command phrase, embedding them once."""
+        if self._index_matrix is None:
+            self._index_matrix = self._normalize(self._embed_batch(list(self._index_keys)))
+        return self._index_matrix
+
+    def _load_intent_commands(self, path):
+        """Loads intent_commands.json, keeping intents that have a command for this platform."""
+        try:
+            with open(path, 'r') as f:
+                intents = json.load(f)
+        except FileNotFoundError:
+            return {}
+        return {name: spec for name, spec in intents.items() if spec.get(self.intent_command_key)}
+
+    def run_intent(self, intent):
+        """Starts the command configured for an intent in intent_commands.json.
+
+        Returns once the process has started, so a slow or long-lived command (an
+        application, a dialog) never stalls the caller; the intent executor reports
+        how it ends. Raises if the command cannot be started.
+        """
+        if self.intent_executor.launch(intent) is None:
+            raise Exception(f"No command configured for intent '{intent}'")
 
     def _embed_text(self, text):
-        """Embeds the text using the NLP model."""
-        with torch.no_grad():
-            embeddings = self.nlp(text)
-        return np.mean(embeddings[0], axis=0)
-
-    def _cosine_similarity(self, emb1, emb2):
-        """Calculates the cosine similarity between two embeddings."""
-        dot_product = np.dot(emb1, emb2)
-        norm_emb1 = np.linalg.norm(emb1)
-        norm_emb2 = np.linalg.norm(emb2)
-        return dot_product / (norm_emb1 * norm_emb2)
+        """Embeds the text using the encoder, serving repeats from the embedding cache."""
+        return self._embed_batch([text])[0]
+
+    def _embed_batch(self, texts):
+        """Embeds texts, running the encoder only on those missing from the embedding cache."""
+        embeddings = [self.embedding_cache.get(text) for text in texts]
+        missing = sorted({text for text, emb in zip(texts, embeddings) if emb is None})
+        if missing:
+            computed = dict(zip(missing, self.encoder.encode(missing)))
+            self.embedding_cache.put_many(missing, [computed[text] for text in missing])
+            embeddings = [computed[text] if emb is None else emb for text, emb in zip(texts, embeddings)]
+        return np.vstack(embeddings).astype(np.float32)
+
+    def _normalize(self, embeddings):
+        """Scales embeddings to unit length along the last axis so dot products are cosine similarities."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return embeddings / np.where(norms == 0, 1, norms)
 
     def execute_script(self, script):
         return self.module.execute_script(script)
@@ -147,33 +289,11 @@ if __name__ == "__main__":
 
     for command in commands:
         try:
-            # Extract command and argument(s) from the command string
-            if " " in command:
-                cmd, arg = command.split(" ", 1)
-            else:
-                cmd, arg = command, ""
-            
-            command_method = base_module.get_command(command)
-            
-            if cmd == "open application":
-                result = command_method(arg)
-            elif cmd == "set volume":
-                result = command_method(int(arg))
-            elif cmd == "display dialog":
-                result = command_method(arg)
-            elif cmd == "display notification":
-                message, title = arg.split(" with title ")
-                result = command_method(message, title)
-            elif cmd == "create folder":
-                result = command_method(arg)
-            elif cmd == "move file":
-                source, destination = arg.split(" to ")
-                result = command_method(source, destination)
-            elif cmd == "delete file":
-                result = command_method(arg)
-            else:
-                result = command_method()
-            
+            match = base_module.match(command)
+            if match is None:
+                print(f"No command matched '{command}'")
+                continue
+            result = base_module.run(match)
             print(f"Command: {command} -> Result: {result}")
         except Exception as e:
             print(f"Error executing command '{command}': {e}")
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "jarvis", "embeddings")
+
+
+class EmbeddingCache:
+    """Persistent, size-bounded store of text embeddings backed by a memory-mapped .npy file.
+
+    Entries are keyed by a hash of the model name, revision, pooling method and text.
+    The signature of the model is recorded in the index, and the whole store is
+    discarded when it no longer matches (different model, revision, pooling or
+    embedding size), so stale vectors are never served.
+
+    revision should be a commit hash (see TransformerEncoder.resolve_revision): a
+    branch name such as "main" stays the same when the model is updated upstream,
+    so the store could not tell that its vectors are stale.
+    """
+
+    def __init__(self, model_name, revision="main", pooling="mean", cache_dir=DEFAULT_CACHE_DIR, max_entries=4096):
+        self.model_name = model_name
+        self.revision = revision
+        self.pooling = pooling
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.matrix_path = os.path.join(cache_dir, "embeddings.npy")
+        self.index_path = os.path.join(cache_dir, "index.json")
+
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._dim = None
+        self._entries = {}
+        self._load()
+
+    @property
+    def signature(self):
+        return {"model": self.model_name, "revision": self.revision, "pooling": self.pooling}
+
+    def key(self, text):
+        """Returns the cache key for a text under the current model signature."""
+        raw = "\0".join([self.model_name, self.revision, self.pooling, text])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text):
+        """Returns the cached embedding for text, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(self.key(text))
+            if entry is None or self._matrix is None:
+                return None
+            entry["last_used"] = time.time()
+            return np.array(self._matrix[entry["row"]])
+
+    def put(self, text, embedding):
+        """Stores an embedding, evicting the least recently used entry when full."""
+        self.put_many([text], [embedding])
+
+    def put_many(self, texts, embeddings):
+        """Stores several embeddings with a single flush and index write."""
+        if not texts:
+            return
+        with self._lock:
+            now = time.time()
+            for text, embedding in zip(texts, embeddings):
+                embedding = np.asarray(embedding, dtype=np.float32).ravel()
+                if self._matrix is None or embedding.shape[0] != self._dim:
+                    self._reset(embedding.shape[0])
+
+                key = self.key(text)
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = {"row": self._free_row()}
+                    self._entries[key] = entry
+                entry["last_used"] = now
+                self._matrix[entry["row"]] = embedding
+
+            self._matrix.flush()
+            self._save_index()
+
+    def clear(self):
+        """Drops every cached embedding."""
+        with self._lock:
+            self._entries = {}
+            self._matrix = None
+            self._dim = None
+            for path in (self.matrix_path, self.index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, text):
+        return self.key(text) in self._entries
+
+    def _load(self):
+        """Opens an existing store, discarding it if it was built for another model."""
+        if not (os.path.exists(self.index_path) and os.path.exists(self.matrix_path)):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            if index.get("signature") != self.signature:
+                self.clear()
+                return
+            matrix = np.load(self.matrix_path, mmap_mode="r+")
+            if matrix.ndim != 2 or matrix.shape[0] != self.max_entries or matrix.shape[1] != index.get("dim"):
+                self.clear()
+                return
+            self._matrix = matrix
+            self._dim = index["dim"]
+            self._entries = index.get("entries", {})
+        except (OSError, ValueError, KeyError):
+            self.clear()
+
+    def _reset(self, dim):
+        """Creates an empty store for embeddings of the given size."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entries = {}
+        self._dim = int(dim)
+        self._matrix = np.lib.format.open_memmap(
+            self.matrix_path, mode="w+", dtype=np.float32, shape=(self.max_entries, self._dim)
+        )
+
+    def _free_row(self):
+        """Returns an unused row, evicting the least recently used entry if needed."""
+        if len(self._entries) < self.max_entries:
+            used = {entry["row"] for entry in self._entries.values()}
+            return next(row for row in range(self.max_entries) if row not in used)
+        victim = min(self._entries, key=lambda k: self._entries[k]["last_used"])
+        return self._entries.pop(victim)["row"]
+
+    def _save_index(self):
+        """Writes the index atomically so a crash never leaves it half written."""
+        index = {"signature": self.signature, "dim": self._dim, "entries": self._entries}
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
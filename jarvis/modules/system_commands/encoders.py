@@ -0,0 +1,96 @@
+import os
+import re
+
+import torch
+import numpy as np
+
+from huggingface_hub import try_to_load_from_cache
+from transformers import AutoModel, AutoTokenizer
+
+COMMIT_HASH = re.compile(r"[0-9a-f]{40}")
+
+
+class TransformerEncoder:
+    """Sentence encoder that mean-pools a transformer's last hidden state over real tokens.
+
+    The model is loaded on first use. With quantize=True the linear layers are
+    converted to dynamic int8, which shrinks the model roughly four-fold and speeds
+    up CPU inference. num_threads sets torch's intra-op thread count when loading.
+    """
+
+    def __init__(self, model_name, revision="main", quantize=False, num_threads=None, batch_size=32):
+        self.model_name = model_name
+        self.revision = revision
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self.pooling = "masked-mean+int8" if quantize else "masked-mean"
+        self.tokenizer = None
+        self.model = None
+
+    def resolve_revision(self):
+        """Returns the commit hash that revision points to in the local Hugging Face cache.
+
+        Branch names such as "main" move when the model is updated upstream, so
+        caches of the model's outputs should be keyed by the commit instead. Falls
+        back to revision itself when the model has not been downloaded yet. This
+        only reads the local cache and never touches the network.
+        """
+        if COMMIT_HASH.fullmatch(self.revision):
+            return self.revision
+        path = try_to_load_from_cache(self.model_name, "config.json", revision=self.revision)
+        if isinstance(path, str):
+            # Cached files live in snapshots/<commit hash>/.
+            return os.path.basename(os.path.dirname(path))
+        return self.revision
+
+    def load(self):
+        """Loads the tokenizer and model if they are not loaded yet."""
+        if self.model is not None:
+            return
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, revision=self.revision)
+        model = AutoModel.from_pretrained(self.model_name, revision=self.revision)
+        model.eval()
+        if self.quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+    def encode(self, texts):
+        """Embeds texts, one padded forward pass per length-sorted batch.
+
+        Sorting by token count before batching keeps padding, and therefore
+        wasted compute, small.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        self.load()
+        encoded = self.tokenizer(list(texts), truncation=True)["input_ids"]
+        order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+        embeddings = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            chunk = order[start:start + self.batch_size]
+            batch = self.tokenizer.pad({"input_ids": [encoded[i] for i in chunk]}, return_tensors="pt")
+            with torch.inference_mode():
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            for i, vector in zip(chunk, pooled.numpy()):
+                embeddings[i] = vector
+        return np.vstack(embeddings).astype(np.float32)
+
+
+ENCODERS = {
+    "bert": {"model_name": "bert-base-uncased"},
+    "minilm": {"model_name": "sentence-transformers/all-MiniLM-L6-v2", "quantize": True},
+}
+
+
+def load_encoder(encoder="bert", **kwargs):
+    """Returns an encoder instance from a name in ENCODERS, or passes an instance through."""
+    if not isinstance(encoder, str):
+        return encoder
+    if encoder not in ENCODERS:
+        raise ValueError(f"Unsupported encoder: {encoder}")
+    return TransformerEncoder(**{**ENCODERS[encoder], **kwargs})
@@ -0,0 +1,176 @@
+import asyncio
+import concurrent.futures
+import json
+import platform
+import re
+import shlex
+import threading
+from collections import namedtuple
+
+
+CommandResult = namedtuple('CommandResult', ['intent', 'argv', 'returncode', 'stdout', 'stderr', 'timed_out'])
+
+
+class CommandExecutor:
+    """Runs intent commands from intent_commands.json without blocking the caller.
+
+    The commands are compiled once into a table of argv lists for the current
+    platform (or system, e.g. 'darwin'). On Windows each command line is kept as
+    written and run through cmd.exe unchanged, since splitting and re-quoting it
+    would mangle quoted PowerShell arguments. Commands run as asyncio subprocesses
+    on a background event loop, at most max_concurrency at a time. After timeout
+    seconds a command is killed, or with kill_on_timeout=False left running (e.g.
+    an application window or a dialog waiting for the user) while the executor
+    stops waiting for it. intent_commands may be passed already loaded instead of
+    json_path.
+    """
+
+    PLATFORM_KEYS = {'darwin': 'mac_command', 'windows': 'windows_command', 'linux': 'linux_command'}
+    SHELL_BUILTINS = frozenset(['echo', 'start', 'cd', 'set'])
+    SHELL_METACHARACTERS = re.compile(r"[|&;<>%$`]")
+
+    def __init__(self, json_path=None, max_concurrency=4, timeout=30, system=None, intent_commands=None,
+                 kill_on_timeout=True):
+        self.system = (system or platform.system()).lower()
+        self.command_key = self.PLATFORM_KEYS.get(self.system, f'{self.system}_command')
+        if intent_commands is None:
+            with open(json_path, 'r') as f:
+                intent_commands = json.load(f)
+        self.intent_commands = intent_commands
+        self.commands = self._compile(self.intent_commands)
+
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.kill_on_timeout = kill_on_timeout
+        self._loop = None
+        self._semaphore = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _compile(self, intent_commands):
+        """Builds {intent: argv} for this platform, falling back to the shell only where needed.
+
+        On Windows the value is the raw command line string instead of an argv list.
+        """
+        commands = {}
+        for intent, spec in intent_commands.items():
+            command = spec.get(self.command_key)
+            if command:
+                commands[intent] = self._split(command)
+        return commands
+
+    def _split(self, command):
+        if self.system == 'windows':
+            return command
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            return ['/bin/sh', '-c', command]
+        if argv[0] in self.SHELL_BUILTINS or any(self.SHELL_METACHARACTERS.fullmatch(arg) for arg in argv):
+            return ['/bin/sh', '-c', command]
+        return argv
+
+    def execute_command(self, intent, entities=None):
+        """Schedules the intent's command and returns a Future of its CommandResult, or None."""
+        return self._schedule(intent)
+
+    def launch(self, intent, start_timeout=5):
+        """Schedules the intent's command and waits only until its process has started.
+
+        Returns the Future of its CommandResult, or None if the intent has no command
+        here; raises if the process could not be started. A command still queued
+        behind max_concurrency others after start_timeout seconds is left queued.
+        """
+        started = concurrent.futures.Future()
+        future = self._schedule(intent, started)
+        if future is not None:
+            try:
+                started.result(timeout=start_timeout)
+            except concurrent.futures.TimeoutError:
+                pass
+        return future
+
+    def _schedule(self, intent, started=None):
+        if intent not in self.intent_commands:
+            print(f"Unknown intent: {intent}")
+            return None
+        argv = self.commands.get(intent)
+        if argv is None:
+            print(f"No command found for {intent} on {self.system}")
+            return None
+        future = asyncio.run_coroutine_threadsafe(self._run(intent, argv, started), self._ensure_loop())
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._finished)
+        return future
+
+    def shutdown(self, wait=True):
+        """Optionally waits for running commands, then stops the background loop."""
+        with self._lock:
+            pending = list(self._pending)
+        if wait and pending:
+            concurrent.futures.wait(pending)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='command-executor', daemon=True).start()
+                self._semaphore = None
+                self._loop = loop
+            return self._loop
+
+    async def _run(self, intent, argv, started=None):
+        if self._semaphore is None:
+            # Created on the loop's own thread so it binds to that loop on every Python version.
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            try:
+                if isinstance(argv, str):
+                    process = await asyncio.create_subprocess_shell(
+                        argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                    )
+                else:
+                    process = await asyncio.create_subprocess_exec(
+                        *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                    )
+            except Exception as e:
+                if started is not None:
+                    started.set_exception(e)
+                raise
+            if started is not None:
+                started.set_result(process.pid)
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+                timed_out = False
+            except asyncio.TimeoutError:
+                timed_out = True
+                if self.kill_on_timeout:
+                    process.kill()
+                    stdout, stderr = await process.communicate()
+                else:
+                    # Leave it running; its concurrency slot is freed and its output is no longer read.
+                    stdout, stderr = b"", b""
+        return CommandResult(intent, argv, process.returncode, stdout.decode(errors='replace'),
+                             stderr.decode(errors='replace'), timed_out)
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending.discard(future)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print(f"Command failed to start: {future.exception()}")
+            return
+        result = future.result()
+        if result.timed_out and result.returncode is None:
+            print(f"Command for {result.intent} is still running after {self.timeout}s; no longer waiting for it")
+        elif result.timed_out:
+            print(f"Command for {result.intent} timed out after {self.timeout}s")
+        elif result.returncode != 0:
+            print(f"Command for {result.intent} exited with {result.returncode}: {result.stderr.strip()}")
+        elif result.stdout.strip():
+            print(result.stdout.strip())
@@ -0,0 +1,92 @@
+import os
+import re
+
+
+def _percent(value):
+    """Converts a percentage slot, rejecting values outside 0-100."""
+    number = int(value)
+    if not 0 <= number <= 100:
+        raise ValueError(f"{number} is not a percentage")
+    return number
+
+
+# Slot type -> (regex, converter). A converter raising ValueError rejects the utterance.
+SLOT_TYPES = {
+    "str": (r".+?", str.strip),
+    "int": (r"\d{1,3}", int),
+    "percent": (r"\d{1,3}", _percent),
+    "path": (r".+?", lambda value: os.path.expanduser(value.strip().strip('"\''))),
+}
+
+_TOKEN = re.compile(r"\{(\w+)(?::(\w+))?\}|\[([^\]]+)\]|(\S+)")
+
+
+class SlotGrammar:
+    """Parses parameterized commands with one precompiled regular expression.
+
+    Each command has a declarative spec made of literal words, optional words in
+    square brackets and typed slots in braces, e.g.
+    'set [the] volume [to] {volume_level:percent} [percent]'. All specs are compiled
+    into a single alternation, so parsing an utterance is one regex pass that
+    yields the command and its converted arguments.
+    """
+
+    def __init__(self, specs):
+        self.specs = dict(specs)
+        self._commands = []
+        self._slots = []
+        alternatives = []
+        for index, (command, spec) in enumerate(self.specs.items()):
+            pattern, slots = self._compile_spec(index, spec)
+            alternatives.append(f"(?P<c{index}>{pattern})")
+            self._commands.append(command)
+            self._slots.append(slots)
+        self._pattern = re.compile(r"\s*(?:" + "|".join(alternatives) + r")\s*", re.IGNORECASE)
+
+    def parse(self, utterance):
+        """Returns (command, kwargs) for an utterance matching a spec, or None.
+
+        Utterances whose slot values fail conversion (e.g. a volume of 500) return None.
+        """
+        if not self.specs:
+            return None
+        match = self._pattern.fullmatch(utterance)
+        if match is None:
+            return None
+        index = int(match.lastgroup[1:])
+        kwargs = {}
+        try:
+            for name, group, convert in self._slots[index]:
+                kwargs[name] = convert(match.group(group))
+        except ValueError:
+            return None
+        return self._commands[index], kwargs
+
+    @staticmethod
+    def _compile_spec(index, spec):
+        """Turns one spec into a regex fragment plus the (slot, group, converter) list."""
+        parts = []
+        slots = []
+        last_slot_type = None
+        for slot, slot_type, optional, literal in _TOKEN.findall(spec):
+            last_slot_type = (slot_type or "str") if slot else None
+            if slot:
+                pattern, convert = SLOT_TYPES[slot_type or "str"]
+                group = f"c{index}_{slot}"
+                parts.append((f"(?P<{group}>{pattern})", False))
+                slots.append((slot, group, convert))
+            elif optional:
+                words = r"\s+".join(re.escape(word) for word in optional.split())
+                parts.append((f"(?:{words})", True))
+            else:
+                parts.append((re.escape(literal), False))
+
+        pattern = ""
+        for i, (part, is_optional) in enumerate(parts):
+            separator = r"\s+" if i else ""
+            pattern += f"(?:{separator}{part})?" if is_optional else f"{separator}{part}"
+        # Dictation often ends with a full stop; drop it unless the spec ends in free text,
+        # whose punctuation belongs to what the user said ("display dialog Hello, World!").
+        if last_slot_type != "str":
+            pattern += r"\s*[.!?]?"
+        return pattern, slots
@@ -0,0 +1,100 @@
+import re
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+
+CommandMatch = namedtuple("CommandMatch", ["command", "confidence", "tier", "args"], defaults=(None,))
+
+EXACT_CONFIDENCE = 1.0
+PREFIX_CONFIDENCE = 0.95
+FUZZY_CEILING = 0.9
+
+
+def tokenize(text):
+    """Lowercases text and splits it into word tokens."""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def camel_to_phrase(name):
+    """Turns an intent name such as 'GetBatteryStatus' into 'get battery status'."""
+    return " ".join(re.findall(r"[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])", name)).lower()
+
+
+def token_sort_ratio(phrase_tokens, utterance_tokens):
+    """Order-insensitive similarity of two token lists, in [0, 1].
+
+    Both sides are compared in full, so tokens present on only one side lower the
+    score; an utterance that merely contains a phrase does not score 1.0.
+    """
+    return SequenceMatcher(None, " ".join(sorted(phrase_tokens)), " ".join(sorted(utterance_tokens))).ratio()
+
+
+class LexicalMatcher:
+    """Cheap command matching that runs before any model inference.
+
+    Phrases are stored in a token trie so exact and longest-prefix matches cost a
+    single walk over the utterance. Utterances the trie misses are compared to every
+    phrase with a token-sort ratio. Confidences are on the same [0, 1] scale as the
+    embedding tier so one rejection threshold applies to all of them.
+
+    Single-word phrases and those in exact_only (e.g. destructive commands) only
+    match an utterance that is exactly the phrase: a lone word inside a sentence
+    ("why does my phone restart randomly") says little about intent. A prefix
+    match also has to cover at least half of the utterance's tokens.
+    """
+
+    def __init__(self, phrases, fuzzy_threshold=0.8, exact_only=()):
+        self.fuzzy_threshold = fuzzy_threshold
+        self._root = {}
+        self._phrases = {}
+        self._exact_only = set()
+        exact_only = set(exact_only)
+        for phrase in phrases:
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[None] = phrase
+            self._phrases[phrase] = tokens
+            if len(tokens) == 1 or phrase in exact_only:
+                self._exact_only.add(phrase)
+
+    def match(self, utterance):
+        """Returns the best lexical CommandMatch for an utterance, or None."""
+        tokens = tokenize(utterance)
+        return self.match_prefix(tokens) or self.match_fuzzy(tokens)
+
+    def match_prefix(self, tokens):
+        """Finds the longest phrase the utterance starts with."""
+        node = self._root
+        best = None
+        for depth, token in enumerate(tokens, start=1):
+            node = node.get(token)
+            if node is None:
+                break
+            if None in node:
+                phrase = node[None]
+                if depth == len(tokens):
+                    return CommandMatch(phrase, EXACT_CONFIDENCE, "exact")
+                if phrase not in self._exact_only and depth * 2 >= len(tokens):
+                    best = phrase
+        if best is None:
+            return None
+        return CommandMatch(best, PREFIX_CONFIDENCE, "prefix")
+
+    def match_fuzzy(self, tokens):
+        """Finds the phrase with the highest token-sort ratio above the fuzzy threshold."""
+        if not tokens:
+            return None
+        best_phrase, best_score = None, 0.0
+        for phrase, phrase_tokens in self._phrases.items():
+            if phrase in self._exact_only:
+                continue
+            score = token_sort_ratio(phrase_tokens, tokens)
+            if score > best_score:
+                best_phrase, best_score = phrase, score
+        if best_score < self.fuzzy_threshold:
+            return None
+        return CommandMatch(best_phrase, best_score * FUZZY_CEILING, "fuzzy")
@@ -1,8 +1,25 @@
+import re
 import pyttsx3
 import pyaudio
 import wave
 import speech_recognition  as sr
 
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def iter_sentences(chunks):
+    """Regroups streamed text chunks into complete sentences as soon as each one ends."""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        parts = SENTENCE_END.split(buffer)
+        for sentence in parts[:-1]:
+            if sentence.strip():
+                yield sentence.strip()
+        buffer = parts[-1]
+    if buffer.strip():
+        yield buffer.strip()
+
 class TalkModule:
     def __init__(self):
         self.tts_engine = pyttsx3.init()
@@ -41,6 +58,14 @@ class TalkModule:
         self.tts_engine.say(text)
         self.tts_engine.runAndWait()
 
+    def speak_stream(self, chunks):
+        """Speaks streamed text sentence by sentence and returns the full text."""
+        spoken = []
+        for sentence in iter_sentences(chunks):
+            self.speak(sentence)
+            spoken.append(sentence)
+        return " ".join(spoken)
+
     def record_audio(self, file_name, duration=5):
         """Records audio from the microphone and saves it to a file."""
         chunk = 1024  # Record in chunks of 1024 samples
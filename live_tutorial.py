@@ -13,8 +13,6 @@ import pyttsx3
 import time
 import sys
 import platform
-import mss
-from PIL import Image
 import random
 import json # For loading config
 import threading # For concurrency
@@ -28,6 +26,10 @@ except ImportError:
     print("ERROR: Cannot find 'gemini.py'. Ensure it's in the same directory.")
     sys.exit(1)
 
+from dirty_regions import DirtyRegionTracker
+from screen_capture import get_capturer
+from screen_dedupe import ScreenResultCache
+
 # --- Default Configuration (can be overridden by config.json) ---
 DEFAULT_CONFIG = {
     "WAKE_WORD": "hey gemini",
@@ -37,6 +39,11 @@ DEFAULT_CONFIG = {
     "MIN_TIP_INTERVAL_SECONDS": 120,
     "CONTEXT_PROMPT": """Analyze this screenshot. Identify the main application window visible (e.g., 'Adobe Photoshop', 'Visual Studio Code', 'Google Chrome', 'Finder'). Also, identify the primary task or UI panel the user seems to be interacting with (e.g., 'Layers Panel', 'Debugger Console', 'Editing Document', 'File Browser'). Return the result as 'APP_NAME - CONTEXT_DESCRIPTION'. If unsure, return 'Unknown - Unknown'.""",
     "KNOWLEDGE_BASE_PATH": "knowledge_base.json", # Path to KB file
+    "IMAGE_PREP": dict(gemini.DEFAULT_IMAGE_PREP), # Resize/encode settings for uploads (null sends the raw capture)
+    "DEDUPE_HASH_SIZE": 16, # Side of the dhash grid; 16 gives 256 bits, fine enough to notice a dialog
+    "DEDUPE_MAX_DISTANCE": 3, # Reuse the last context while the screen hash differs by at most this many bits
+    "DEDUPE_TTL_SECONDS": 300,
+    "DIRTY_MAX_CHANGED_FRACTION": 0.25, # Send only the changed region when it covers at most this share of the screen
     "EXIT_COMMAND": "exit assistant"
 }
 
@@ -65,6 +72,12 @@ class TutorialAssistant:
         self.last_proactive_tip_time = 0
         self.context_tip_indices = {ctx: 0 for ctx in self.knowledge_base}
         self.running = True # Flag to control threads
+        self.screen_cache = ScreenResultCache(max_distance=self.config["DEDUPE_MAX_DISTANCE"],
+                                              ttl=self.config["DEDUPE_TTL_SECONDS"],
+                                              hash_size=self.config["DEDUPE_HASH_SIZE"])
+        self.dirty_tracker = DirtyRegionTracker(max_changed_fraction=self.config["DIRTY_MAX_CHANGED_FRACTION"])
+        self.last_context_desc = None
+        self.last_context_desc_time = 0
 
         # Threading locks for shared state access
         self.context_lock = threading.Lock()
@@ -180,23 +193,42 @@ class TutorialAssistant:
         except Exception as e: print(f"ERROR: Listening/SR failed: {e}"); return None
 
     def capture_screen(self):
-        """Captures the primary screen."""
+        """Captures the primary screen as a screen_capture.Frame."""
         try:
-            with mss.mss() as sct:
-                if len(sct.monitors) < 2: print("ERROR: No primary monitor."); return None
-                monitor = sct.monitors[1]
-                sct_img = sct.grab(monitor)
-                img_pil = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-                return img_pil
+            return get_capturer().grab()
         except Exception as e: print(f"ERROR: Screen capture failed: {e}"); return None
 
     def identify_context(self):
         """Identifies screen context using Gemini."""
         print("Identifying screen context...")
-        screen_image = self.capture_screen()
-        if not screen_image: return "unknown-unknown"
-
-        context_desc = gemini.analyze_image_with_gemini(screen_image, prompt=self.config["CONTEXT_PROMPT"])
+        frame = self.capture_screen()
+        if frame is None: return "unknown-unknown"
+        screen_image = frame.to_pil()
+
+        # Diff against the frame last_context_desc describes; no changed tiles means it still holds,
+        # for up to DEDUPE_TTL_SECONDS like the hash cache
+        change = self.dirty_tracker.diff(frame.array)
+        fresh = time.time() - self.last_context_desc_time < self.config["DEDUPE_TTL_SECONDS"]
+        if change.bbox is None and self.last_context_desc is not None and fresh:
+            context_desc = self.last_context_desc
+        else:
+            analysed = []
+
+            def analyze(image):
+                analysed.append(True)
+                return self._analyze_changes(image, change)
+
+            # The hash cache is the fallback, e.g. for a screen analysed before the last one
+            context_desc = self.screen_cache.get_or_compute(
+                screen_image,
+                analyze,
+                cacheable=lambda text: not gemini.is_error_response(text),
+            )
+            if analysed and not gemini.is_error_response(context_desc):
+                # Only a fresh analysis describes this exact frame, so only it moves the diff baseline.
+                self.dirty_tracker.commit(frame.array)
+                self.last_context_desc = context_desc
+                self.last_context_desc_time = time.time()
 
         if not context_desc or "error" in context_desc.lower():
             print(f"WARN: Context analysis failed: {context_desc}")
@@ -231,6 +263,14 @@ class TutorialAssistant:
         print(f"Identified context (raw): '{context_desc}' -> Normalized: '{normalized_context}'")
         return normalized_context
 
+    def _analyze_changes(self, screen_image, change):
+        """Sends only the changed region when the change is small, otherwise the whole screen."""
+        kwargs = {"prompt": self.config["CONTEXT_PROMPT"], "image_prep": self.config["IMAGE_PREP"]}
+        if change.partial and self.last_context_desc:
+            print(f"INFO: {change.changed_fraction:.1%} of the screen changed, analysing region {change.bbox} only.")
+            return gemini.analyze_region_with_gemini(screen_image, change.bbox, self.last_context_desc, **kwargs)
+        return gemini.analyze_image_with_gemini(screen_image, **kwargs)
+
     def get_tip(self, context):
         """Gets the next tip for the context."""
         if context in self.knowledge_base:
@@ -361,6 +401,7 @@ class TutorialAssistant:
         print("INFO: Waiting for threads to finish...")
         listener_thread.join(timeout=2)
         checker_thread.join(timeout=2)
+        print(f"INFO: Screen dedupe stats: {self.screen_cache.stats()}")
         print("INFO: Assistant stopped.")
 
 
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Screen Capture Module
+
+One persistent screen grabber shared by the screen tools. Frames are exposed as
+NumPy views over the BGRA buffer mss fills, and converted to PIL images only
+when asked. Optionally, a background thread keeps a small ring buffer of recent
+frames at a fixed rate.
+"""
+
+import threading
+import time
+from collections import deque
+
+import mss
+import numpy as np
+from PIL import Image
+
+class Frame:
+    """
+    One captured frame. array is an H x W x 4 BGRA view over the capture buffer
+    (no copy); to_pil() builds an RGB image on first use and caches it. Every grab
+    gets its own buffer, so a frame stays valid after later captures.
+    """
+
+    __slots__ = ("shot", "timestamp", "_array", "_pil")
+
+    def __init__(self, shot, timestamp):
+        self.shot = shot
+        self.timestamp = timestamp
+        self._array = None
+        self._pil = None
+
+    @property
+    def size(self):
+        return self.shot.size
+
+    @property
+    def array(self):
+        if self._array is None:
+            # shot.raw is the grabbed bytearray; shot.bgra would return a bytes copy of it.
+            self._array = np.frombuffer(self.shot.raw, dtype=np.uint8).reshape(self.shot.height, self.shot.width, 4)
+        return self._array
+
+    def to_pil(self):
+        if self._pil is None:
+            self._pil = Image.frombuffer("RGB", self.shot.size, self.shot.raw, "raw", "BGRX", 0, 1)
+        return self._pil
+
+class ScreenCapturer:
+    """
+    Persistent grabber for one monitor (1 is the primary; 0 is all monitors combined).
+
+    mss handles are not safe to share between threads, so each thread that
+    captures keeps its own, opened on first use and reused afterwards. With
+    buffer_size > 0, start() launches a thread that grabs at fps frames per
+    second into a ring buffer of that many frames; latest() then returns the
+    newest buffered frame instead of grabbing.
+    """
+
+    def __init__(self, monitor=1, fps=2.0, buffer_size=0):
+        self.monitor = monitor
+        self.fps = fps
+        self.buffer_size = buffer_size
+        self.frames = deque(maxlen=max(buffer_size, 1))
+        self.captures = 0
+        self._local = threading.local()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def _grabber(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+            if len(sct.monitors) <= self.monitor:
+                raise mss.ScreenShotError(f"Monitor {self.monitor} not found ({len(sct.monitors) - 1} available).")
+            self._local.region = sct.monitors[self.monitor]
+        return sct, self._local.region
+
+    def grab(self):
+        """Captures a new frame with this thread's grabber."""
+        sct, region = self._grabber()
+        frame = Frame(sct.grab(region), time.time())
+        with self._lock:
+            self.captures += 1
+        return frame
+
+    def latest(self):
+        """Returns the newest buffered frame while the background thread runs, otherwise a new grab."""
+        with self._lock:
+            if self._thread is not None and self.frames:
+                return self.frames[-1]
+        return self.grab()
+
+    def recent(self):
+        """Returns the buffered frames, oldest first."""
+        with self._lock:
+            return list(self.frames)
+
+    def start(self):
+        """Starts filling the ring buffer in the background; does nothing if buffer_size is 0."""
+        if self.buffer_size <= 0 or self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="screen-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop_event.set()
+            thread.join(timeout=2)
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        next_capture = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    frame = self.grab()
+                    with self._lock:
+                        self.frames.append(frame)
+                except Exception as e:
+                    print(f"WARN: Background screen capture failed: {e}")
+                next_capture += interval
+                # Skip missed slots instead of bursting after a slow grab.
+                next_capture = max(next_capture, time.monotonic())
+                self._stop_event.wait(next_capture - time.monotonic())
+        finally:
+            self._close_grabber()
+
+    def _close_grabber(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+    def close(self):
+        """Stops the background thread and closes the calling thread's grabber."""
+        self.stop()
+        self._close_grabber()
+
+# --- Shared Capturers ---
+_capturers = {}
+_capturers_lock = threading.Lock()
+
+def get_capturer(monitor=1):
+    """Returns the process-wide ScreenCapturer for a monitor."""
+    with _capturers_lock:
+        if monitor not in _capturers:
+            _capturers[monitor] = ScreenCapturer(monitor)
+        return _capturers[monitor]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Screen Dedupe Module
+
+Perceptual hashes of screen captures, and a small cache that reuses the result
+of an earlier capture (e.g. a Gemini description) when the screen has not
+visibly changed since.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+def dhash(pil_image, hash_size=8):
+    """
+    Difference hash: the sign of horizontal brightness gradients on a
+    (hash_size + 1) x hash_size thumbnail, packed into an int.
+    """
+    # BOX averages every source pixel, so one resize of a 4K capture is cheap and alias-free.
+    small = pil_image.resize((hash_size + 1, hash_size), Image.BOX).convert("L")
+    pixels = np.asarray(small, dtype=np.int16)
+    return _pack_bits(pixels[:, 1:] > pixels[:, :-1])
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    return np.cos(np.pi * (2 * x + 1) * k / (2 * n))
+
+_DCT_MATRICES = {}
+
+def phash(pil_image, hash_size=8, highfreq_factor=4):
+    """
+    DCT hash: low-frequency DCT coefficients of a grayscale thumbnail compared
+    with their median, packed into an int. Slower than dhash but more robust to
+    small shifts and rescaling.
+    """
+    size = hash_size * highfreq_factor
+    small = pil_image.resize((size, size), Image.BOX).convert("L")
+    pixels = np.asarray(small, dtype=np.float64)
+    dct = _DCT_MATRICES.get(size)
+    if dct is None:
+        dct = _DCT_MATRICES[size] = _dct_matrix(size)
+    low = (dct @ pixels @ dct.T)[:hash_size, :hash_size]
+    # The DC term only encodes mean brightness; leave it out of the median.
+    return _pack_bits(low > np.median(low.ravel()[1:]))
+
+def _pack_bits(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+def hamming(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+HASH_FUNCTIONS = {"dhash": dhash, "phash": phash}
+
+class ScreenResultCache:
+    """
+    Reuses results for captures whose perceptual hash is within max_distance bits
+    of a recently analysed capture.
+
+    Screens are mostly flat regions with small high-contrast detail, so a change
+    that matters (a dialog, a new line of output) touches only a few cells of the
+    hash grid. With an 8 x 8 dhash each bit summarises 1/64 of the screen and
+    such a change often flips fewer than 4 bits. The default 16 x 16 dhash (256
+    bits) gives each bit 1/256 of the screen, and max_distance=3 (about 1% of the
+    bits) still absorbs a blinking cursor or a ticking clock.
+
+    Entries expire after ttl seconds, so a long-idle screen is still re-analysed
+    now and then, and at most max_entries hashes are kept, least recently used
+    first out. hits and misses count lookups.
+    """
+
+    def __init__(self, max_distance=3, ttl=300.0, max_entries=32, hash_fn="dhash", hash_size=16):
+        if hash_fn not in HASH_FUNCTIONS:
+            raise ValueError(f"Unsupported hash function: {hash_fn}")
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hash_fn = HASH_FUNCTIONS[hash_fn]
+        self.hash_size = hash_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, image_hash):
+        """Returns the cached result of the closest live entry within max_distance, or None."""
+        with self._lock:
+            now = time.time()
+            best_key, best_distance = None, self.max_distance + 1
+            for key, (result, created) in list(self._entries.items()):
+                if self.ttl is not None and now - created > self.ttl:
+                    del self._entries[key]
+                    continue
+                distance = hamming(key, image_hash)
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][0]
+
+    def put(self, image_hash, result):
+        with self._lock:
+            self._entries[image_hash] = (result, time.time())
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, pil_image, compute, cacheable=None):
+        """
+        Returns the cached result for a near-identical capture, or calls
+        compute(pil_image) and caches its result if cacheable(result) is true.
+        """
+        image_hash = self.hash_fn(pil_image, hash_size=self.hash_size)
+        result = self.get(image_hash)
+        if result is not None:
+            return result
+        result = compute(pil_image)
+        if result is not None and (cacheable is None or cacheable(result)):
+            self.put(image_hash, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns hit/miss counters, the hit rate and the current entry count."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
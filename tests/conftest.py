@@ -0,0 +1,6 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# system_commands is imported without the jarvis.modules package, whose __init__ loads the chat models.
+sys.path.insert(0, os.path.join(ROOT, "jarvis", "modules"))
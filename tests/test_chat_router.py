@@ -0,0 +1,134 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from chat_router import ChatRouter, StandInChat
+
+
+class EmptyChat:
+    def get_response_stream(self, prompt, cancel_event=None):
+        return iter(())
+
+
+def half_open_router(backends):
+    router = ChatRouter(backends, hedge=False, cooldown=0.0)
+    for breaker in router.breakers.values():
+        breaker.opened_at = time.monotonic() - 1
+    return router
+
+
+def test_empty_stream_releases_trial_slot():
+    router = half_open_router({"empty": EmptyChat()})
+    list(router.get_response_stream("hello"))
+    assert router.breakers["empty"].state == "half-open"
+    assert not router.breakers["empty"].trial_in_flight
+
+
+def test_cancelled_hedge_releases_trial_slot():
+    router = half_open_router({"backup": StandInChat()})
+    assert router._allow("backup")
+    future = Future()
+    future.cancel()
+    router._on_done("backup", time.monotonic(), future)
+    assert not router.breakers["backup"].trial_in_flight
+    assert router.stats["backup"].requests == 0
+
+
+def test_first_chunk_closes_breaker():
+    router = half_open_router({"ok": StandInChat(latency=0.0)})
+    stream = router.get_response_stream("hello")
+    next(stream)
+    stream.close()
+    assert router.breakers["ok"].state == "closed"
+
+
+class StatefulStandIn(StandInChat):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts = []
+
+    def get_response(self, prompt, cancel_event=None):
+        self.prompts.append(prompt)
+        return super().get_response(prompt, cancel_event)
+
+    def checkpoint(self):
+        return list(self.prompts)
+
+    def rollback(self, checkpoint):
+        self.prompts = list(checkpoint)
+
+
+def seed_latency(router, name, latency, samples=5):
+    for _ in range(samples):
+        router.stats[name].record(latency, True)
+
+
+def test_routes_to_the_lowest_latency_backend():
+    router = ChatRouter({"slow": StandInChat("slow", latency=0.05), "fast": StandInChat("fast", latency=0.0)},
+                        hedge=False)
+    for _ in range(3):
+        router.get_response("hi")
+    assert router._ranked_backends() == ["fast", "slow"]
+    assert router.get_response("hi") == "[fast] hi"
+
+
+def test_hedges_past_the_tail_latency_and_first_success_wins():
+    router = ChatRouter({"stalled": StandInChat("stalled", latency=2.0), "backup": StandInChat("backup", latency=0.0)},
+                        min_hedge_delay=0.05)
+    seed_latency(router, "stalled", 0.01)
+    seed_latency(router, "backup", 0.02)
+
+    start = time.monotonic()
+    assert router.get_response("hi") == "[backup] hi"
+    assert time.monotonic() - start < 1.0
+
+
+def test_losing_hedge_is_cancelled():
+    router = ChatRouter({"stalled": StandInChat("stalled", latency=2.0), "backup": StandInChat("backup", latency=0.0)},
+                        min_hedge_delay=0.05)
+    seed_latency(router, "stalled", 0.01)
+    seed_latency(router, "backup", 0.02)
+    router.get_response("hi")
+
+    start = time.monotonic()
+    router._executor.shutdown(wait=True)
+    assert time.monotonic() - start < 1.0
+    # A cancelled call is not counted as a failure of the backend.
+    assert router.stats["stalled"].requests == 5
+    assert router.breakers["stalled"].failures == 0
+
+
+def test_stateful_backends_are_not_raced():
+    stateful = StatefulStandIn(name="stateful", latency=0.2)
+    router = ChatRouter({"stateful": stateful, "plain": StandInChat("plain", latency=0.0)}, min_hedge_delay=0.05)
+    seed_latency(router, "stateful", 0.01)
+    seed_latency(router, "plain", 0.02)
+    assert router.get_response("hi") == "[stateful] hi"
+
+    backup = StatefulStandIn(name="backup", latency=0.0)
+    router = ChatRouter({"stalled": StandInChat("stalled", latency=0.2), "backup": backup}, min_hedge_delay=0.05)
+    seed_latency(router, "stalled", 0.01)
+    seed_latency(router, "backup", 0.02)
+    assert router.get_response("hi") == "[stalled] hi"
+    assert backup.prompts == []
+
+
+def test_fails_over_to_the_next_backend():
+    router = ChatRouter({"broken": StandInChat("broken", failure_rate=1.0), "ok": StandInChat("ok", latency=0.0)},
+                        hedge=False)
+    seed_latency(router, "broken", 0.01)
+    seed_latency(router, "ok", 0.02)
+    assert router.get_response("hi") == "[ok] hi"
+    assert router.stats["broken"].error_rate > 0
+
+
+def test_breaker_opens_after_failure_threshold():
+    router = ChatRouter({"broken": StandInChat("broken", latency=0.0, failure_rate=1.0)}, hedge=False,
+                        failure_threshold=2, cooldown=60.0)
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="broken failed"):
+            router.get_response("hi")
+    assert router.breakers["broken"].state == "open"
+    with pytest.raises(RuntimeError, match="No healthy chat backend"):
+        router.get_response("hi")
@@ -0,0 +1,142 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+chatbot = pytest.importorskip("jarvis.modules.chatbot")
+
+EOS = 0
+
+
+class StubTokenizer:
+    """One token per word; "<eos>" is the end-of-sequence token."""
+
+    eos_token = " <eos>"
+    eos_token_id = EOS
+
+    def encode(self, text):
+        return [EOS if word == "<eos>" else len(word) for word in text.split()]
+
+    def decode(self, ids, skip_special_tokens=False):
+        return " ".join(f"w{i}" for i in ids if not (skip_special_tokens and i == EOS))
+
+
+class StubModel:
+    """Replies with reply_length tokens, then EOS, and records the cache it was given."""
+
+    def __init__(self, reply_length=3):
+        self.reply_length = reply_length
+        self.past_seen = []
+        self.input_lengths = []
+
+    def generate(self, input_ids, past_key_values=None, max_new_tokens=8, stopping_criteria=None,
+                 return_dict_in_generate=False, **kwargs):
+        self.past_seen.append(past_key_values)
+        self.input_lengths.append(input_ids.shape[1])
+        sequences = input_ids
+        for step in range(max_new_tokens):
+            token = 7 if step < self.reply_length else EOS
+            sequences = torch.cat([sequences, torch.full((sequences.shape[0], 1), token)], dim=1)
+            if token == EOS or any(criteria(sequences, None).all() for criteria in stopping_criteria or ()):
+                break
+        if return_dict_in_generate:
+            return SimpleNamespace(sequences=sequences, past_key_values=object())
+        return sequences
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(chatbot, "load_causal_lm", lambda name, quantize=False: (StubTokenizer(), model))
+    return model
+
+
+def make_chat(max_context_tokens=32, max_new_tokens=4):
+    return chatbot.DiabloChat("stub", max_context_tokens=max_context_tokens, max_new_tokens=max_new_tokens)
+
+
+def assert_in_step(chat):
+    assert sum(chat._turn_lengths) == len(chat._context_ids)
+    assert len(chat._turn_lengths) == len(chat.conversation_history)
+
+
+def test_context_stays_in_step_and_within_budget(model):
+    chat = make_chat()
+    for turn in range(12):
+        chat.get_response(f"turn {turn} words")
+        assert_in_step(chat)
+    assert len(chat.conversation_history) < 12
+    assert all(length + chat.max_new_tokens <= chat.max_context_tokens for length in model.input_lengths)
+
+
+def test_cache_is_reused_until_eviction(model):
+    chat = make_chat()
+    chat.get_response("one two three")
+    chat.get_response("one two three")
+    assert model.past_seen[0] is None
+    assert model.past_seen[1] is not None
+
+    # Each turn is 4 prompt + 4 reply tokens; the fifth would need 32 + 4 + 4 > 32 tokens.
+    for _ in range(3):
+        chat.get_response("one two three")
+    assert model.past_seen[3] is not None
+    assert model.past_seen[4] is None
+    assert_in_step(chat)
+
+
+def test_appends_eos_only_when_the_reply_lacks_one(model):
+    chat = make_chat()
+    chat.get_response("hello there")
+    assert chat._context_ids[-2:] == [7, EOS] and chat._context_ids[-3] != EOS
+
+    model.reply_length = chat.max_new_tokens
+    chat.get_response("hello there")
+    assert chat._context_ids[-2:] == [7, EOS]
+    assert chat.conversation_history[-1][1] == "w7 w7 w7 w7"
+    assert_in_step(chat)
+
+
+def test_cancelled_turn_leaves_the_conversation_untouched(model):
+    chat = make_chat()
+    chat.get_response("hello there")
+    before = chat.checkpoint()
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(chatbot.GenerationCancelled):
+        chat.get_response("never mind", cancel_event=cancel_event)
+    assert chat.checkpoint() == before
+    assert chat._past_key_values is None
+
+
+def test_rollback_restores_the_checkpoint(model):
+    chat = make_chat(max_context_tokens=64)
+    chat.get_response("hello there")
+    checkpoint = chat.checkpoint()
+    chat.get_response("speculative turn")
+    chat.rollback(checkpoint)
+    assert chat.checkpoint() == checkpoint
+    assert chat._past_key_values is None
+    assert_in_step(chat)
+
+    chat.get_response("real turn")
+    assert model.past_seen[-1] is None
+    assert [prompt for prompt, _ in chat.conversation_history] == ["hello there", "real turn"]
+
+
+def test_scheduler_survives_a_failed_model_load(monkeypatch):
+    scheduler = chatbot.GenerationScheduler("stub", max_wait_ms=0)
+
+    def fail(name, quantize=False):
+        raise OSError("no such model")
+
+    monkeypatch.setattr(chatbot, "load_causal_lm", fail)
+    with pytest.raises(OSError):
+        scheduler.submit([1, 2], max_new_tokens=4).result(timeout=5)
+
+    monkeypatch.setattr(chatbot, "load_causal_lm", lambda name, quantize=False: (StubTokenizer(), StubModel()))
+    assert scheduler.submit([1, 2], max_new_tokens=8).result(timeout=5) == [7, 7, 7, EOS]
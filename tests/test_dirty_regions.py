@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dirty_regions import DirtyRegionTracker  # noqa: E402
+
+
+def blank():
+    return np.full((720, 1280, 4), 240, dtype=np.uint8)
+
+
+def test_first_frame_is_a_full_change():
+    change = DirtyRegionTracker().diff(blank())
+    assert change.bbox == (0, 0, 1280, 720) and not change.partial
+
+
+def test_unchanged_frame_has_no_bbox():
+    tracker = DirtyRegionTracker()
+    tracker.commit(blank())
+    assert tracker.diff(blank()).bbox is None
+
+
+def test_diff_keeps_baseline_until_commit():
+    tracker = DirtyRegionTracker()
+    tracker.commit(blank())
+    first = blank()
+    first[100:140, 100:300] = 0
+    second = first.copy()
+    second[500:540, 900:1100] = 0
+
+    tracker.diff(first)
+    change = tracker.diff(second)
+    assert len(change.rects) == 2
+
+    tracker.commit(first)
+    change = tracker.diff(second)
+    assert len(change.rects) == 1 and change.partial
+    left, top, right, bottom = change.bbox
+    assert left <= 900 and top <= 500 and right >= 1100 and bottom >= 540
@@ -0,0 +1,55 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from system_commands.embedding_cache import EmbeddingCache  # noqa: E402
+
+
+def make_cache(tmp_path, **kwargs):
+    options = {"model_name": "model", "revision": "a" * 40, "pooling": "mean", "max_entries": 4}
+    options.update(kwargs)
+    return EmbeddingCache(cache_dir=str(tmp_path), **options)
+
+
+def vector(value, dim=3):
+    return np.full(dim, value, dtype=np.float32)
+
+
+def test_persists_across_instances(tmp_path):
+    make_cache(tmp_path).put_many(["hello", "world"], [vector(1), vector(2)])
+    reopened = make_cache(tmp_path)
+    assert len(reopened) == 2
+    np.testing.assert_array_equal(reopened.get("world"), vector(2))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put("a", vector(1))
+    cache.put("b", vector(2))
+    cache._entries[cache.key("a")]["last_used"] = 0  # make "a" the oldest without sleeping
+    cache.put("c", vector(3))
+    assert "a" not in cache and "b" in cache and "c" in cache
+    np.testing.assert_array_equal(cache.get("c"), vector(3))
+
+
+@pytest.mark.parametrize("change", [{"model_name": "other"}, {"revision": "b" * 40}, {"pooling": "cls"}])
+def test_signature_change_discards_store(tmp_path, change):
+    make_cache(tmp_path).put("hello", vector(1))
+    reopened = make_cache(tmp_path, **change)
+    assert len(reopened) == 0
+    assert reopened.get("hello") is None
+
+
+def test_dimension_change_resets_store(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("hello", vector(1, dim=3))
+    cache.put("world", vector(2, dim=5))
+    assert "hello" not in cache
+    reopened = make_cache(tmp_path)
+    assert len(reopened) == 1
+    assert reopened.get("world").shape == (5,)
+
+
+def test_size_change_discards_store(tmp_path):
+    make_cache(tmp_path).put("hello", vector(1))
+    assert len(make_cache(tmp_path, max_entries=8)) == 0
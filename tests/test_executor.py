@@ -0,0 +1,78 @@
+import sys
+import time
+
+import pytest
+
+from system_commands.executor import CommandExecutor
+
+PYTHON = sys.executable
+
+
+def make_executor(commands, **kwargs):
+    intent_commands = {intent: {"linux_command": command} for intent, command in commands.items()}
+    return CommandExecutor(intent_commands=intent_commands, system="linux", **kwargs)
+
+
+def test_runs_command_in_background():
+    executor = make_executor({"Greet": f"{PYTHON} -c \"print('hi')\""})
+    try:
+        result = executor.execute_command("Greet").result(timeout=10)
+    finally:
+        executor.shutdown()
+    assert (result.returncode, result.stdout.strip(), result.timed_out) == (0, "hi", False)
+
+
+def test_kills_command_after_timeout():
+    executor = make_executor({"Hang": f"{PYTHON} -c \"import time; time.sleep(30)\""}, timeout=0.2)
+    try:
+        result = executor.execute_command("Hang").result(timeout=10)
+    finally:
+        executor.shutdown()
+    assert result.timed_out
+
+
+def test_unknown_intent_returns_none():
+    executor = make_executor({})
+    assert executor.execute_command("Missing") is None
+
+
+def test_windows_keeps_command_line_unchanged():
+    command = "powershell -Command \"(New-Object -ComObject WScript.Shell).SendKeys([char]175)\""
+    executor = CommandExecutor(intent_commands={"VolumeUp": {"windows_command": command}}, system="Windows")
+    assert executor.commands["VolumeUp"] == command
+
+
+def test_launch_returns_once_process_started():
+    executor = make_executor({"Dialog": f"{PYTHON} -c \"import time; time.sleep(1)\""})
+    try:
+        start = time.monotonic()
+        future = executor.launch("Dialog")
+        assert time.monotonic() - start < 0.9
+        assert not future.done()
+        assert future.result(timeout=10).returncode == 0
+    finally:
+        executor.shutdown()
+
+
+def test_launch_raises_when_command_cannot_start():
+    executor = make_executor({"Missing": "/nonexistent/binary"})
+    try:
+        with pytest.raises(OSError):
+            executor.launch("Missing")
+    finally:
+        executor.shutdown()
+
+
+def test_timeout_leaves_command_running_without_kill(tmp_path):
+    marker = tmp_path / "done"
+    script = f"import time; time.sleep(0.5); open({str(marker)!r}, 'w').close()"
+    executor = make_executor({"Notepad": f"{PYTHON} -c \"{script}\""}, timeout=0.1, kill_on_timeout=False)
+    try:
+        result = executor.launch("Notepad").result(timeout=10)
+        assert result.timed_out and result.returncode is None
+        deadline = time.monotonic() + 5
+        while not marker.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert marker.exists()
+    finally:
+        executor.shutdown()
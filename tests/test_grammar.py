@@ -0,0 +1,41 @@
+import pytest
+
+from system_commands.grammar import SlotGrammar
+
+SPECS = {
+    'set volume': 'set [the] volume [to] {volume_level:percent} [percent]',
+    'move file': 'move file {source:path} to {destination:path}',
+    'display dialog': 'display [a] dialog [saying] {message}',
+}
+
+
+@pytest.fixture(scope="module")
+def grammar():
+    return SlotGrammar(SPECS)
+
+
+@pytest.mark.parametrize("utterance, level", [
+    ("set volume 0", 0),
+    ("set the volume to 50 percent", 50),
+    ("Set volume 100.", 100),
+])
+def test_parses_volume_in_range(grammar, utterance, level):
+    assert grammar.parse(utterance) == ("set volume", {"volume_level": level})
+
+
+@pytest.mark.parametrize("utterance", ["set volume 500", "set volume 101", "set volume 1000", "set volume loud"])
+def test_rejects_volume_out_of_range(grammar, utterance):
+    assert grammar.parse(utterance) is None
+
+
+def test_parses_paths(grammar):
+    assert grammar.parse("move file '/tmp/a.txt' to /tmp/b") == ("move file", {"source": "/tmp/a.txt", "destination": "/tmp/b"})
+
+
+@pytest.mark.parametrize("utterance, message", [
+    ("display dialog Hello, World!", "Hello, World!"),
+    ("display a dialog saying Are you sure?", "Are you sure?"),
+    ("display dialog Done.", "Done."),
+])
+def test_keeps_punctuation_in_free_text(grammar, utterance, message):
+    assert grammar.parse(utterance) == ("display dialog", {"message": message})
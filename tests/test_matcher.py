@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+from system_commands.matcher import LexicalMatcher, camel_to_phrase, token_sort_ratio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_COMMANDS = [
+    'open application', 'set volume', 'mute volume', 'unmute volume', 'get volume', 'display dialog',
+    'display notification', 'create folder', 'move file', 'delete file', 'get current time',
+    'get battery status', 'get network info', 'open finder window', 'get frontmost finder path',
+    'close all finder windows',
+]
+# Mirrors commands.PROTECTED_COMMANDS, which cannot be imported without the encoder stack.
+PROTECTED = {'shutdown', 'restart', 'delete file', 'close all finder windows'}
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    with open(os.path.join(ROOT, "intent_commands.json")) as f:
+        intents = [camel_to_phrase(name) for name in json.load(f)]
+    phrases = list(dict.fromkeys(BASE_COMMANDS + intents))
+    return LexicalMatcher(phrases, fuzzy_threshold=0.8, exact_only=PROTECTED)
+
+
+@pytest.mark.parametrize("utterance", [
+    "please do not shutdown the computer",
+    "how do I restart my router",
+    "why does my phone restart randomly",
+    "restart the music",
+    "delete",
+    "get",
+])
+def test_chit_chat_does_not_match(matcher, utterance):
+    assert matcher.match(utterance) is None
+
+
+@pytest.mark.parametrize("utterance, command, tier", [
+    ("mute volume", "mute volume", "exact"),
+    ("shutdown", "shutdown", "exact"),
+    ("volume mute", "mute volume", "fuzzy"),
+    ("get volme", "get volume", "fuzzy"),
+    ("get battery status now", "get battery status", "prefix"),
+])
+def test_commands_still_match(matcher, utterance, command, tier):
+    match = matcher.match(utterance)
+    assert match is not None
+    assert (match.command, match.tier) == (command, tier)
+
+
+def test_token_sort_ratio_penalizes_extra_tokens():
+    assert token_sort_ratio(["shutdown"], ["shutdown"]) == 1.0
+    assert token_sort_ratio(["shutdown"], "please do not shutdown the computer".split()) < 0.5
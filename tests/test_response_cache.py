@@ -0,0 +1,108 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import response_cache  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def embed_by_first_word(texts):
+    """Prompts sharing a first word embed close together; the rest point elsewhere."""
+    vectors = []
+    for text in texts:
+        words = text.split()
+        vector = np.zeros(3, dtype=np.float32)
+        vector[0] = 1.0 if words[0] == "weather" else 0.0
+        vector[1] = 0.3 * (len(words) > 3)
+        vector[2] = 1.0 if words[0] != "weather" else 0.0
+        vectors.append(vector)
+    return np.vstack(vectors)
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = ResponseCache()
+    cache.put("gemini", "What time is it?", "Noon.")
+    assert cache.get("gemini", "what time is it") == "Noon."
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl=60)
+    cache.put("gemini", "hello", "hi")
+    clock[0] += 59
+    assert cache.get("gemini", "hello") == "hi"
+    clock[0] += 2
+    assert cache.get("gemini", "hello") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("gemini", "one", "1")
+    cache.put("gemini", "two", "2")
+    cache.get("gemini", "one")
+    cache.put("gemini", "three", "3")
+    assert cache.get("gemini", "two") is None
+    assert cache.get("gemini", "one") == "1"
+    assert cache.get("gemini", "three") == "3"
+
+
+def test_namespaces_are_isolated():
+    cache = ResponseCache(embed=embed_by_first_word)
+    cache.put("gemini", "weather today", "Sunny.")
+    assert cache.get("openai", "weather today") is None
+    assert cache.get("openai", "weather today please") is None
+
+
+def test_near_duplicate_threshold():
+    # "weather today" and "weather in the city" embed to [1, 0, 0] and [1, 0.3, 0]: cosine ~0.958.
+    cache = ResponseCache(embed=embed_by_first_word, similarity_threshold=0.95)
+    cache.put("gemini", "weather today", "Sunny.")
+    assert cache.get("gemini", "weather in the city") == "Sunny."
+    assert cache.get("gemini", "news today") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+    strict = ResponseCache(embed=embed_by_first_word, similarity_threshold=0.97)
+    strict.put("gemini", "weather today", "Sunny.")
+    assert strict.get("gemini", "weather in the city") is None
+
+
+def test_reloads_from_sqlite(tmp_path):
+    db_path = str(tmp_path / "responses.db")
+    cache = ResponseCache(embed=embed_by_first_word, db_path=db_path)
+    cache.put("gemini", "weather today", "Sunny.")
+    cache.put("openai", "hello", "Hi.")
+
+    reopened = ResponseCache(embed=embed_by_first_word, db_path=db_path)
+    assert reopened.get("openai", "hello") == "Hi."
+    assert reopened.get("gemini", "weather in the city") == "Sunny."
+
+
+def test_reload_skips_expired_entries(tmp_path, clock):
+    db_path = str(tmp_path / "responses.db")
+    ResponseCache(ttl=60, db_path=db_path).put("gemini", "hello", "hi")
+    clock[0] += 61
+    assert ResponseCache(ttl=60, db_path=db_path).get("gemini", "hello") is None
+
+
+def test_open_trims_table_to_max_entries(tmp_path, clock):
+    db_path = str(tmp_path / "responses.db")
+    cache = ResponseCache(db_path=db_path)
+    for i in range(5):
+        clock[0] += 1
+        cache.put("gemini", f"prompt {i}", str(i))
+
+    reopened = ResponseCache(max_entries=2, db_path=db_path)
+    assert reopened.get("gemini", "prompt 4") == "4"
+    assert reopened.get("gemini", "prompt 2") is None
+    rows = sqlite3.connect(db_path).execute("SELECT prompt FROM responses ORDER BY created").fetchall()
+    assert rows == [("prompt 3",), ("prompt 4",)]
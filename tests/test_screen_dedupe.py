@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from screen_dedupe import ScreenResultCache  # noqa: E402
+
+
+def editor_screen():
+    rng = np.random.default_rng(0)
+    screen = np.full((1080, 1920, 3), 240, dtype=np.uint8)
+    for y in range(100, 1000, 24):
+        screen[y:y + 10, 100:100 + rng.integers(200, 1500)] = 30
+    return screen
+
+
+def cached_after(change):
+    cache = ScreenResultCache()
+    screen = editor_screen()
+    cache.get_or_compute(Image.fromarray(screen), lambda image: "first")
+    changed = screen.copy()
+    change(changed)
+    return cache.get_or_compute(Image.fromarray(changed), lambda image: "second")
+
+
+def test_cursor_blink_reuses_result():
+    assert cached_after(lambda s: s.__setitem__((slice(500, 518), slice(700, 702)), 0)) == "first"
+
+
+def test_dialog_is_reanalysed():
+    def open_dialog(s):
+        s[440:640, 760:1160] = 200
+        s[440:460, 760:1160] = 60
+    assert cached_after(open_dialog) == "second"
+
+
+def test_new_output_line_is_reanalysed():
+    assert cached_after(lambda s: s.__setitem__((slice(1004, 1014), slice(100, 1400)), 30)) == "second"